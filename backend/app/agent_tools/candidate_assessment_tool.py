@@ -1,5 +1,5 @@
 from langchain.tools import tool
-from langchain.prompts import PromptTemplate
+from app.llm_handler.prompt_registry import prompt_registry, get_schema_string
 from app.llm_handler.llm_handler import ChatCompletionHandler
 from app.models.candidate_assessment import CandidateFinalScore
 from app.models.score_result import CVScore
@@ -21,7 +21,7 @@ from ag_ui.core import (
 from langgraph.config import get_stream_writer
 
 @tool
-def candiate_assessment_process(candidate_cv_score: CVScore,
+async def candiate_assessment_process(candidate_cv_score: CVScore,
                                 candidate_social_score: Optional[SocialMediaScore] | None,
                                 candidate_world_check_score: Optional[WorldCheck] | None
                                 ) -> CandidateFinalScore:
@@ -37,22 +37,19 @@ def candiate_assessment_process(candidate_cv_score: CVScore,
     """
     writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - candidate_assessment - Generating candidate final assessment score..."))  
-    system_message = open("app/knowledge_base/scoring_process/system_message.txt").read()
-    user_message = open("app/knowledge_base/scoring_process/candidate_assessment_template.txt").read()
+    system_message = prompt_registry.text("system_message")
 
-    # Create LangChain PromptTemplate
-    user_prompt = PromptTemplate.from_template(user_message)
-
-    # Format user prompt with variables
-    formatted_user_message = user_prompt.format(
-        output_model_structure=CandidateFinalScore.model_json_schema(),
+    # Format the precompiled user prompt with variables
+    formatted_user_message = prompt_registry.format(
+        "candidate_assessment_template",
+        output_model_structure=get_schema_string(CandidateFinalScore),
         cv_score=candidate_cv_score,
         social_media_score=candidate_social_score,
         world_check_score=candidate_world_check_score
     )
 
     handler = ChatCompletionHandler()
-    result =  handler.run_chain(system_message,formatted_user_message,output_model=CandidateFinalScore, node_id="candidate_assessment")
+    result =  await handler.arun_chain(system_message,formatted_user_message,output_model=CandidateFinalScore, node_id="candidate_assessment")
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - candidate_assessment - Generating CV score completed successfully"))  
     return result
\ No newline at end of file
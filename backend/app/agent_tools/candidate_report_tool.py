@@ -1,5 +1,5 @@
 from langchain.tools import tool
-from langchain.prompts import PromptTemplate
+from app.llm_handler.prompt_registry import prompt_registry, get_schema_string
 from app.llm_handler.llm_handler import ChatCompletionHandler
 from app.models.candidate_report import CandidateReport
 from app.models.candidate_assessment import CandidateFinalScore
@@ -18,7 +18,7 @@ from ag_ui.core import (
 from langgraph.config import get_stream_writer
 
 @tool
-def generate_candidate_report(candidate_cv_data: str, candidate_final_score: CandidateFinalScore):
+async def generate_candidate_report(candidate_cv_data: str, candidate_final_score: CandidateFinalScore):
     """Generate a candidate report based on CV data and final score.
 
     Args:
@@ -30,21 +30,18 @@ def generate_candidate_report(candidate_cv_data: str, candidate_final_score: Can
     """
     writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - report_generation - Generating candidate's report..."))  
-    system_message = open("app/knowledge_base/scoring_process/system_message.txt").read()
-    user_message = open("app/knowledge_base/scoring_process/candidate_report_template.txt").read()
+    system_message = prompt_registry.text("system_message")
 
-    # Create LangChain PromptTemplate
-    user_prompt = PromptTemplate.from_template(user_message)
-
-    # Format user prompt with variables
-    formatted_user_message = user_prompt.format(
-        output_model_structure=CandidateReport.model_json_schema(),
+    # Format the precompiled user prompt with variables
+    formatted_user_message = prompt_registry.format(
+        "candidate_report_template",
+        output_model_structure=get_schema_string(CandidateReport),
         candidate_cv_data = candidate_cv_data,
         candidate_final_score=candidate_final_score
     )
 
     handler = ChatCompletionHandler()
-    result =  handler.run_chain(system_message,formatted_user_message,output_model=CandidateReport,node_id="report_generation")
+    result =  await handler.arun_chain(system_message,formatted_user_message,output_model=CandidateReport,node_id="report_generation", stream=True)
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - report_generation - Generating candidate's report completed successfully"))  
     return result
\ No newline at end of file
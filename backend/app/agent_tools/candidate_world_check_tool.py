@@ -3,6 +3,7 @@ from app.models.candidate_info import Candidate
 from app.models.world_check import WorldCheck
 from app.database.db import get_world_check_info
 from fastapi import HTTPException
+import asyncio
 
 from ag_ui.core import (
     RunStartedEvent,
@@ -18,13 +19,13 @@ from ag_ui.core import (
 from langgraph.config import get_stream_writer
 
 @tool
-def candidate_world_check(candidate_cv_data: Candidate):
+async def candidate_world_check(candidate_cv_data: Candidate):
     """ Get Candidate World Check Information"""
     writer = get_stream_writer()
 
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - world_check - Retrieving Candidate Information"))  
 
-    candidate_world_check = get_candidate_world_check_info(candidate_cv_data)
+    candidate_world_check = await asyncio.to_thread(get_candidate_world_check_info, candidate_cv_data)
 
     if not candidate_world_check:
         return {"error" : "Candidate not found in world check database"}
@@ -1,5 +1,5 @@
 from langchain.tools import tool
-from langchain.prompts import PromptTemplate
+from app.llm_handler.prompt_registry import prompt_registry, get_schema_string
 from app.llm_handler.llm_handler import ChatCompletionHandler
 from app.models.score_result import CVScore
 from app.models.job_description import JobDescription
@@ -22,7 +22,7 @@ from langgraph.config import get_stream_writer
 import uuid
 
 @tool
-def score_cv_against_jd(cv_data: str, job_description: JobDescription) -> CVScore:
+async def score_cv_against_jd(cv_data: str, job_description: JobDescription) -> CVScore:
     """Score a CV against a job description using an LLM.
 
     Args:
@@ -35,12 +35,11 @@ def score_cv_against_jd(cv_data: str, job_description: JobDescription) -> CVScor
     writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - cv_scoring - Generating CV score..."))  
     # Load prompt templates
-    system_message = open("app/knowledge_base/scoring_process/system_message.txt").read()
-    user_message = open("app/knowledge_base/scoring_process/cv_scoring_template.txt").read()
+    system_message = prompt_registry.text("system_message")
 
-    user_prompt = PromptTemplate.from_template(user_message)
-    formatted_user_message = user_prompt.format(
-        output_model_structure=CVScore.model_json_schema(),
+    formatted_user_message = prompt_registry.format(
+        "cv_scoring_template",
+        output_model_structure=get_schema_string(CVScore),
         job_description=job_description.model_dump_json(exclude={"job_postings_vector"}),
         candidate_cv_content=cv_data
     )
@@ -48,7 +47,7 @@ def score_cv_against_jd(cv_data: str, job_description: JobDescription) -> CVScor
     handler = ChatCompletionHandler()
 
     # Run LLM chain with streaming
-    result =  handler.run_chain(
+    result =  await handler.arun_chain(
         system_message=system_message,
         user_message=formatted_user_message,
         output_model=CVScore,
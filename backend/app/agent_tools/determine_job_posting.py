@@ -1,13 +1,6 @@
 
-from typing import List
-from langchain_text_splitters import CharacterTextSplitter
-import numpy as np
-from app.llm_handler.embedder import get_embeddings
 from langchain.tools import tool
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from app.llm_handler.embedder import GeminiEmbedder
-from app.database.db import get_job_postings
-from fastapi import HTTPException
+from app.database.db import refresh_job_posting_index
 
 from ag_ui.core import (
     RunStartedEvent,
@@ -21,44 +14,33 @@ from ag_ui.core import (
 
 
 from langgraph.config import get_stream_writer
-from app.models.job_description import JobDescription
 
-import json
-from datetime import datetime
-
-from google import genai
-from google.genai import types
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import asyncio
 
+from app.llm_handler.clients import get_embedder
+from app.llm_handler.embedder import pool_embeddings
+from app.database.vector_codec import encode_vector
 import os
-from openai import AzureOpenAI
-from app.llm_handler.embedder import OpenAIEmbedder
-
-endpoint = "https://ai-manuai007693985398858.openai.azure.com/"
-model_name = "text-embedding-3-small"
-deployment = "text-embedding-3-small"
-api_version = "2024-12-01-preview"
 
-openAI_embedder = OpenAIEmbedder()
+# How the per-chunk similarities of a CV are pooled into its score: "mean" or "max"
+JOB_MATCH_POOLING = os.getenv("JOB_MATCH_POOLING", "mean")
 
 @tool
-def determine_job_posting(candidate_cv_data: str,  threshold: float = 0.5) -> JobDescription:
+async def determine_job_posting(candidate_cv_data: str,  threshold: float = 0.5) -> dict:
     """
     Determines the most relevant job posting for a candidate based on their CV data.
+
+    Returns:
+        dict: The best job_description (None when no posting passes the threshold), its
+        similarity and the encoded cv_embedding, the mean pooled CV vector kept for reverse search.
     """
     writer = get_stream_writer()
+    openAI_embedder = get_embedder()
 
-    client = AzureOpenAI(
-        api_version=api_version,
-        azure_endpoint=endpoint,
-        api_key=os.environ.get("AZURE_API_KEY")
-    )
-
-   
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - job_posting_determination - Retrieving Job Postings"))  
 
-    job_postings = get_all_job_postings()
+    # Postings are matched against the resident index, rebuilt from the database only when stale
+    index = await asyncio.to_thread(refresh_job_posting_index)
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - job_posting_determination - Job Postings retrieved successfully"))  
 
@@ -66,39 +48,22 @@ def determine_job_posting(candidate_cv_data: str,  threshold: float = 0.5) -> Jo
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="2 - job_posting_determination - Embedding CV"))  
 
     cv_chunks = openAI_embedder.chunk_document(candidate_cv_data)
-    cv_embeddings = openAI_embedder.embed_text(cv_chunks)
+    cv_embeddings = await asyncio.to_thread(openAI_embedder.embed_text, cv_chunks, "job_posting_determination")
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - job_posting_determination - CV embedding completed"))  
     
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="3 - job_posting_determination - Evaluating job postings"))  
 
     best_match = {"job_description": None,
-                    "similarity": 0.0
+                    "similarity": 0.0,
+                    "cv_embedding": encode_vector(pool_embeddings(cv_embeddings, "mean"), openAI_embedder.model_name) if cv_embeddings.size else None
                 }
 
-    # Compare CV against each job description
-    for jd in job_postings:
-
-        similarity_matrix = cosine_similarity(np.array(cv_embeddings).reshape(1, -1), np.array(json.loads(jd["job_postings_vector"])).reshape(1, -1))
-
-        max_per_cv = similarity_matrix.max(axis=1)
-        overall_score = max_per_cv.mean()
-
-        if overall_score and overall_score > best_match["similarity"] and overall_score > threshold:
-            best_match = {"job_description": jd, "similarity": overall_score}
+    # One matrix product scores every posting, only the best one is kept
+    matches = index.search(cv_embeddings, k=1, pooling=JOB_MATCH_POOLING)
+    if matches and matches[0][1] > threshold:
+        best_match.update({"job_description": matches[0][0], "similarity": matches[0][1]})
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="3 - job_posting_determination - Job evaluation completed"))  
     
-    return best_match["job_description"]
-
-def get_all_job_postings(): 
-
-    try: 
-        response =  get_job_postings()
-
-        if not response:
-            raise HTTPException(status_code=500, detail="No job postings available")
-
-        return response 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    return best_match
@@ -1,7 +1,18 @@
 from agentic_doc.parse import parse
-from app.models.candidate_info import Candidate
+from app.models.candidate_info import Candidate, CandidateProfile
 from dotenv import load_dotenv
 from langchain.tools import tool
+from typing import Optional
+import asyncio
+import os
+import tempfile
+from app.workflow.concurrency import stage_limit
+from app.document_extraction.extraction_cache import extraction_cache
+from app.document_extraction.pdf_text import PYMUPDF_AVAILABLE, extract_pdf_text
+from app.document_extraction.page_ranges import split_pdf, merge_extractions
+from app.llm_handler.prompt_registry import prompt_registry, get_schema_string
+from app.llm_handler.llm_handler import ChatCompletionHandler
+from app.replay.cassette import external_call
 
 from ag_ui.core import (
     RunStartedEvent,
@@ -18,8 +29,47 @@ from langgraph.config import get_stream_writer
 
 load_dotenv(override=True)
 
+# Digital PDFs passing the quality gate are extracted locally, the others by Landing AI
+LOCAL_PDF_EXTRACTION = os.getenv("LOCAL_PDF_EXTRACTION", "true").lower() in ("1", "true", "yes")
+
+async def extract_candidate_locally(pdf_path: str) -> Optional[Candidate]:
+    """Extract candidate information from the text layer of a digital PDF.
+
+    The markdown is built locally and a fast structured LLM pass fills in the profile.
+
+    Args:
+        pdf_path (str): Path to the candidate's CV in PDF format.
+
+    Returns:
+        Optional[Candidate]: Extracted candidate information, None when the PDF should go to Landing AI.
+    """
+    writer = get_stream_writer()
+    try:
+        pdf_text = await asyncio.to_thread(extract_pdf_text, pdf_path)
+    except Exception as e:
+        print(f"Local PDF extraction failed: {e}")
+        return None
+
+    if not pdf_text.is_usable():
+        writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name=f"1 - document_extraction - Text layer unusable ({pdf_text.page_count} pages, {pdf_text.empty_pages} without text, {pdf_text.chars_per_page:.0f} chars per page), falling back to Landing AI"))
+        return None
+
+    formatted_user_message = prompt_registry.format(
+        "cv_extraction_template",
+        output_model_structure=get_schema_string(CandidateProfile),
+        candidate_cv_content=pdf_text.markdown
+    )
+    try:
+        handler = ChatCompletionHandler()
+        profile = await handler.arun_chain(prompt_registry.text("system_message"), formatted_user_message, output_model=CandidateProfile, node_id="document_extraction", route="cv_extraction")
+        # The markdown is the local conversion, never echoed back by the model
+        return Candidate.model_validate({**profile.model_dump(), "markdown": pdf_text.markdown})
+    except Exception as e:
+        writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name=f"1 - document_extraction - Local extraction failed ({str(e)}), falling back to Landing AI"))
+        return None
+
 @tool
-def convert_pdf_to_markdown_landing_ai(pdf_path: str) -> Candidate:
+async def convert_pdf_to_markdown_landing_ai(pdf_path: str) -> Candidate:
     """Extracts candidate information from a PDF using Landing AI.
 
     Args:
@@ -30,16 +80,30 @@ def convert_pdf_to_markdown_landing_ai(pdf_path: str) -> Candidate:
     """ 
     writer = get_stream_writer()
     try:    
+        # Re-uploaded CVs are served from the content-addressed cache instead of Landing AI
+        writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="0 - document_extraction - Checking extraction cache..."))
+        cache_key = await asyncio.to_thread(extraction_cache.key_for, pdf_path)
+        cached_fields = await asyncio.to_thread(extraction_cache.get, cache_key)
+
+        if cached_fields is not None:
+            writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="0 - document_extraction - Extraction cache hit, skipping Landing AI parsing"))
+            return cached_fields
+
+        writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="0 - document_extraction - Extraction cache miss"))
+
         # Extract candidte info from CV in pdf format using Landing AI
         # filepath: path of CV
         # extraction_model: extract specific data from pdf based on Candidate class 
         writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - document_extraction - Parsing CV contents ..."))       
-        parsed_docs = parse(pdf_path, extraction_model=Candidate, include_metadata_in_markdown=True, include_marginalia=True)
+        fields = await extract_candidate_locally(pdf_path) if LOCAL_PDF_EXTRACTION and PYMUPDF_AVAILABLE else None
+
+        if fields is None:
+            fields = await parse_candidate_landing_ai(pdf_path, cache_key)
         writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - document_extraction - Parsing CV contents completed successfully"))
 
 
         writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="2 - document_extraction - Extracting CV contents..."))
-        fields = parsed_docs[0].extraction
+        await asyncio.to_thread(extraction_cache.put, cache_key, fields)
         writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - document_extraction - Extracting CV contents completed successully"))
 
         # Return data into JSON
@@ -50,4 +114,65 @@ def convert_pdf_to_markdown_landing_ai(pdf_path: str) -> Candidate:
 
     except Exception as e:
         print('Error in convert_pdf_to_markdown_landing_ai:', str(e))
-        return Candidate()
\ No newline at end of file
+        return Candidate()
+
+def parse_candidate(pdf_path: str) -> Candidate:
+    """Parse a CV with Landing AI and return the extracted Candidate."""
+    parsed_docs = parse(pdf_path, extraction_model=Candidate, include_metadata_in_markdown=True, include_marginalia=True)
+    return parsed_docs[0].extraction
+
+async def parse_candidate_landing_ai(pdf_path: str, cache_key: str) -> Candidate:
+    """Parse a CV with Landing AI, page ranges of long documents in parallel.
+
+    Args:
+        pdf_path (str): Path to the candidate's CV in PDF format.
+        cache_key (str): Extraction cache key of the PDF, identifying it in recordings.
+
+    Returns:
+        Candidate: Extracted candidate information.
+    """
+    with tempfile.TemporaryDirectory() as ranges_dir:
+        ranges = await asyncio.to_thread(split_pdf, pdf_path, ranges_dir)
+
+        if not ranges:
+            # parse is blocking, so it runs in a worker thread to keep the event loop free
+            async with stage_limit("landing_ai"):
+                # Recorded by the contents of the PDF so replays do not depend on the upload path
+                return await external_call(
+                    "landing_ai",
+                    {"document": cache_key},
+                    lambda: asyncio.to_thread(parse_candidate, pdf_path),
+                    encode=lambda candidate: candidate.model_dump(),
+                    decode=Candidate.model_validate
+                )
+
+        async def _parse_range(range_path: str, first_page: int, last_page: int) -> dict:
+            try:
+                # Each range holds the Landing AI limit on its own, so ranges of all screenings share it
+                async with stage_limit("landing_ai"):
+                    return await external_call(
+                        "landing_ai",
+                        {"document": cache_key, "pages": [first_page, last_page]},
+                        lambda: asyncio.to_thread(parse_page_range, range_path),
+                        encode=lambda part: part,
+                        decode=lambda part: part
+                    )
+            except Exception as e:
+                # A failed range only loses its own pages, the merge works with the others
+                print(f"Landing AI parsing of pages {first_page}-{last_page} failed: {e}")
+                return {"extraction": None, "markdown": ""}
+
+        # gather keeps the page order, so the merge is deterministic
+        parts = await asyncio.gather(*(_parse_range(*page_range) for page_range in ranges))
+
+    return Candidate.model_validate(merge_extractions(parts))
+
+def parse_page_range(pdf_path: str) -> dict:
+    """Parse a page range with Landing AI, keeping its markdown when no candidate could be extracted."""
+    parsed_doc = parse(pdf_path, extraction_model=Candidate, include_metadata_in_markdown=True, include_marginalia=True)[0]
+    extraction = getattr(parsed_doc, "extraction", None)
+    return {
+        "extraction": extraction.model_dump(mode="json") if extraction is not None else None,
+        "markdown": parsed_doc.markdown
+    }
+
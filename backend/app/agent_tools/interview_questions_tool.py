@@ -1,8 +1,9 @@
 from langchain.tools import tool
-from langchain.prompts import PromptTemplate
+from app.llm_handler.prompt_registry import prompt_registry, get_schema_string
 from app.llm_handler.llm_handler import ChatCompletionHandler
-from app.models.interview_questions import InterviewQAs
-from typing import List
+from app.models.interview_questions import InterviewQAs, QuestionReplacements
+from typing import List, Tuple
+import json
 from app.models.job_description import JobDescription
 
 from ag_ui.core import (
@@ -21,7 +22,7 @@ from langgraph.config import get_stream_writer
 
 
 @tool
-def generate_interview_questions(candidate_cv_content: str, job_description: JobDescription) -> InterviewQAs:
+async def generate_interview_questions(candidate_cv_content: str, job_description: JobDescription) -> InterviewQAs:
     """
     Generates tailored interview questions based on the candidate's CV data.
     
@@ -34,21 +35,18 @@ def generate_interview_questions(candidate_cv_content: str, job_description: Job
     writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - question_generation - Generating interview questions..."))  
     # Load system and user messages from files
-    system_message = open("app/knowledge_base/scoring_process/system_message.txt").read()
-    user_message = open("app/knowledge_base/scoring_process/interview_questions_template.txt").read()
+    system_message = prompt_registry.text("system_message")
 
-    # Create LangChain PromptTemplate
-    user_prompt = PromptTemplate.from_template(user_message)
-
-    # Format user prompt with variables
-    formatted_user_message = user_prompt.format(
-        output_model_structure=InterviewQAs.model_json_schema(),
+    # Format the precompiled user prompt with variables
+    formatted_user_message = prompt_registry.format(
+        "interview_questions_template",
+        output_model_structure=get_schema_string(InterviewQAs),
         job_description=job_description,
         candidate_cv_content=candidate_cv_content
     )
 
     handler = ChatCompletionHandler()
-    result =  handler.run_chain(system_message,formatted_user_message,output_model=InterviewQAs,node_id="question_generation")
+    result =  await handler.arun_chain(system_message,formatted_user_message,output_model=InterviewQAs,node_id="question_generation", stream=True)
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - question_generation - Generating interview questions completed successfully"))  
 
@@ -56,37 +54,64 @@ def generate_interview_questions(candidate_cv_content: str, job_description: Job
 
 
 @tool
-def regenerate_interview_questions(interview_questions: InterviewQAs, hallucinated_questions: List[str], candidate_cv_content: str, job_description: JobDescription) -> InterviewQAs:
+async def regenerate_flagged_questions(flagged_questions: List[dict], candidate_cv_content: str, job_description: JobDescription) -> QuestionReplacements:
     """
-    Generates tailored interview questions based on the candidate's CV data.
+    Generates replacements for the interview questions flagged by the semantic validation only.
     
     Args:
-        cv_data (str): Candidate's CV data.
+        flagged_questions (List[dict]): Flagged questions with their category and index.
+        candidate_cv_content (str): The markdown representation of the candidate's CV.
+        job_description (JobDescription): The job description.
     
     Returns:
-        InterviewQAs: Generated interview questions.
+        QuestionReplacements: One new question per flagged question.
     """
     writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="4 - question_generation - Regenerating hallucinated interview questions..."))  
-    # Load system and user messages from files
-    system_message = open("app/knowledge_base/scoring_process/system_message.txt").read()
-    user_message = open("app/knowledge_base/scoring_process/regenerate_interview_questions_template.txt").read()
-
-    # Create LangChain PromptTemplate
-    user_prompt = PromptTemplate.from_template(user_message)
-
-    # Format user prompt with variables
-    formatted_user_message = user_prompt.format(
-        interview_questions=interview_questions,
-        hallucinated_questions=hallucinated_questions,
-        output_model_structure=InterviewQAs.model_json_schema(),
+    system_message = prompt_registry.text("system_message")
+
+    # Only the flagged questions are sent and rewritten, not the whole question set
+    formatted_user_message = prompt_registry.format(
+        "regenerate_flagged_questions_template",
+        flagged_questions=json.dumps([
+            {"category": question["category"], "index": question["index"], "question": question["question"]}
+            for question in flagged_questions
+        ], indent=2),
+        output_model_structure=get_schema_string(QuestionReplacements),
         job_description=job_description,
         candidate_cv_content=candidate_cv_content
     )
 
     handler = ChatCompletionHandler()
-    result = handler.run_chain(system_message,formatted_user_message,output_model=InterviewQAs,node_id="question_generation")
+    result = await handler.arun_chain(system_message,formatted_user_message,output_model=QuestionReplacements,node_id="question_generation", stream=True, route="question_regeneration")
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="4 - question_generation - Regenerating hallucinated interview questions completed successfully"))  
     
-    return result
\ No newline at end of file
+    return result
+
+
+def apply_question_replacements(interview_questions: InterviewQAs, flagged_questions: List[dict], replacements: QuestionReplacements) -> Tuple[InterviewQAs, List[dict]]:
+    """
+    Splices replacement questions back into their category and position.
+
+    Replacements for positions that were not flagged, or repeating the flagged question, are ignored.
+
+    Args:
+        interview_questions (InterviewQAs): The current interview questions.
+        flagged_questions (List[dict]): Flagged questions with their category and index.
+        replacements (QuestionReplacements): Replacements generated for the flagged questions.
+
+    Returns:
+        Tuple[InterviewQAs, List[dict]]: The updated interview questions and the replaced questions, in the format of the flagged ones.
+    """
+    flagged = {(question["category"], question["index"]): question["question"] for question in flagged_questions}
+    updated = {category: list(getattr(interview_questions, category)) for category, _ in flagged}
+
+    replaced = {}
+    for replacement in replacements.replacements:
+        key = (replacement.category, replacement.index)
+        if key in flagged and replacement.question.strip() and replacement.question != flagged[key]:
+            updated[replacement.category][replacement.index] = replacement.question
+            replaced[key] = {"category": replacement.category, "index": replacement.index, "question": replacement.question}
+
+    return interview_questions.model_copy(update=updated), list(replaced.values())
@@ -1,11 +1,14 @@
 from dotenv import load_dotenv
 from langchain.tools import tool
-import requests, os, base64
+import os, base64, asyncio
+import httpx
 from urllib.parse import urlparse
-from langchain.prompts import PromptTemplate
+from app.llm_handler.prompt_registry import prompt_registry, get_schema_string
 from app.llm_handler.llm_handler import ChatCompletionHandler
 
 from app.models.project_info import ProjectInfo, RepositoryInfo
+from app.workflow.concurrency import STAGE_LIMITS, stage_limit
+from app.replay.cassette import external_call, encode_httpx_response, decode_httpx_response
 
 load_dotenv(override=True)
 
@@ -24,9 +27,11 @@ from langgraph.config import get_stream_writer
 
 GITHUB_TOKEN = os.environ.get("GITHUB_API_KEY")  # optional but recommended
 HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
+# READMEs of a candidate fetched at the same time, the github stage limit is shared by every screening
+GITHUB_README_CONCURRENCY = int(os.getenv("GITHUB_README_CONCURRENCY", str(STAGE_LIMITS["github"])))
 
 @tool
-def get_project_summary(project_url: str):
+async def get_project_summary(project_url: str):
     """
     Generates tailored project summary based on the candidate's project data."""
 
@@ -40,23 +45,34 @@ def get_project_summary(project_url: str):
     
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - project_contribution - Username extracted successfully")) 
 
-    writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="2 - project_contribution - Retrieving Repositories...")) 
-    repositories = list_user_repos(username)
+    async with httpx.AsyncClient(headers=HEADERS) as client:
+        writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="2 - project_contribution - Retrieving Repositories...")) 
+        repositories = await alist_user_repos(client, username)
 
-    if not repositories:
-        return {"error": "No repositories found or unable to fetch repositories"}
-    writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - project_contribution - Repositories retrieved successfully"))
+        if not repositories:
+            return {"error": "No repositories found or unable to fetch repositories"}
+        writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - project_contribution - Repositories retrieved successfully"))
 
-    writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="3 - project_contribution - Summarizing Repositories..."))
-    project_info = []
-    for repository in repositories:
-        repo_info = summarize_repo(username, repository["name"], repository["fork"])
+        writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="3 - project_contribution - Summarizing Repositories..."))
+        readme_limit = asyncio.Semaphore(GITHUB_README_CONCURRENCY)
+
+        async def _summarize(repository: dict) -> RepositoryInfo:
+            async with readme_limit:
+                return await asummarize_repo(client, username, repository["name"], repository["fork"])
+
+        # Fetch the READMEs concurrently, a failed fetch only loses the description of its repository
+        results = await asyncio.gather(*[_summarize(repository) for repository in repositories], return_exceptions=True)
 
-        project_info.append(repo_info)
+    project_info = []
+    for repository, result in zip(repositories, results):
+        if isinstance(result, BaseException):
+            print(f"README of {username}/{repository['name']} not fetched: {result}")
+            result = RepositoryInfo(name=repository["name"], url=f"https://github.com/{username}/{repository['name']}", description="No description available", fork=repository["fork"])
+        project_info.append(result)
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="3 - project_contribution - Repositories summarized successfully"))
     
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="4 - project_contribution - Generating Project summary..."))  
-    result = generate_project_summary(project_info)
+    result = await agenerate_project_summary(list(project_info))
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="4 - project_contribution - Generating Project summary completed successfully"))
 
     return result
@@ -70,51 +86,46 @@ def extract_username(project_url: str) -> str:
     username = parsed_url.path.strip('/')
     return username
     
-def list_user_repos(username):
+async def alist_user_repos(client: httpx.AsyncClient, username):
     """List public repositories for a given GitHub username."""
 
     url = f"https://api.github.com/users/{username}/repos"
-    response = requests.get(url, headers=HEADERS)
+    async with stage_limit("github"):
+        response = await external_call("github", {"url": url}, lambda: client.get(url), encode=encode_httpx_response, decode=decode_httpx_response)
 
     if response.status_code != 200:
         return []
-    
-    # print(response.json())
+
     return [
         {"name": repo["name"], "fork": repo["fork"]}
         for repo in response.json()
     ]
 
-def summarize_repo(username, repository_name, repository_fork):
+async def asummarize_repo(client: httpx.AsyncClient, username, repository_name, repository_fork):
     """Summarize a repository by fetching its README content."""
 
     url = f"https://api.github.com/repos/{username}/{repository_name}/readme"
-    response = requests.get(url, headers=HEADERS)
+    async with stage_limit("github"):
+        response = await external_call("github", {"url": url}, lambda: client.get(url), encode=encode_httpx_response, decode=decode_httpx_response)
     if response.status_code != 200:
         return RepositoryInfo(name=repository_name, url=f"https://github.com/{username}/{repository_name}", description="No description available", fork=False)
-    
+
     item = response.json()
     read_me_content = base64.b64decode(item["content"]).decode("utf-8")
-    # Here you can add logic to summarize the files or extract relevant information
     return RepositoryInfo(name=repository_name, url=f"https://github.com/{username}/{repository_name}", description=read_me_content, fork=repository_fork)
 
-def generate_project_summary(project_info: list) -> ProjectInfo:
+async def agenerate_project_summary(project_info: list) -> ProjectInfo:
     """
-    Generates tailored project summary based on the candidate's project data."""     
-    # Load system and user messages from files
-    system_message = open("app/knowledge_base/scoring_process/system_message.txt").read()
-    user_message = open("app/knowledge_base/scoring_process/project_contribution_template.txt").read()
-
-    # Create LangChain PromptTemplate
-    user_prompt = PromptTemplate.from_template(user_message)
+    Generates tailored project summary based on the candidate's project data."""
+    system_message = prompt_registry.text("system_message")
 
-    # Format user prompt with variables
-    formatted_user_message = user_prompt.format(
-        output_model_structure=ProjectInfo.model_json_schema(),
+    formatted_user_message = prompt_registry.format(
+        "project_contribution_template",
+        output_model_structure=get_schema_string(ProjectInfo),
         project_info=project_info
     )
 
     handler = ChatCompletionHandler()
-    result =  handler.run_chain(system_message,formatted_user_message,output_model=ProjectInfo,node_id="project_contribution")
+    result = await handler.arun_chain(system_message,formatted_user_message,output_model=ProjectInfo,node_id="project_contribution")
 
-    return result
\ No newline at end of file
+    return result
@@ -21,10 +21,13 @@ from ag_ui.core import (
 
 
 from langgraph.config import get_stream_writer
-from langchain.prompts import PromptTemplate
+from app.llm_handler.prompt_registry import prompt_registry, get_schema, get_schema_string
+from app.llm_handler.usage_tracker import record_usage
+from app.llm_handler.rate_limiter import get_rate_limiter, estimate_tokens, is_rate_limit_error
+from app.replay.cassette import external_call
 
 @tool
-def get_social_media_presence(social_url: str):
+async def get_social_media_presence(social_url: str):
     """Fetch social media presence data for a given URL.
 
     Args:
@@ -35,19 +38,16 @@ def get_social_media_presence(social_url: str):
     """
     writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="1 - social_media_screening - Initializing web crawl..."))  
-    user_message = open("app/knowledge_base/scoring_process/social_media_scoring_template.txt").read()
-
-        # Create LangChain PromptTemplate
-    user_prompt = PromptTemplate.from_template(user_message)
-
-    # Format user prompt with variables
-    formatted_user_message = user_prompt.format(
-        output_model_structure=SocialMediaScore.model_json_schema())
+    # Format the precompiled user prompt with variables
+    formatted_user_message = prompt_registry.format(
+        "social_media_scoring_template",
+        output_model_structure=get_schema_string(SocialMediaScore))
 
     # 1. Define the LLM extraction strategy
+    llm_provider = "gemini/gemini-2.0-flash-exp"
     llm_strategy = LLMExtractionStrategy(
-        llm_config = LLMConfig(provider="gemini/gemini-2.0-flash-exp", api_token=os.getenv('GOOGLE_API_KEY')),
-        schema=SocialMediaScore.model_json_schema(),
+        llm_config = LLMConfig(provider=llm_provider, api_token=os.getenv('GOOGLE_API_KEY')),
+        schema=get_schema(SocialMediaScore),
         extraction_type="schema",
         instruction= formatted_user_message,
         chunk_token_threshold=1000,
@@ -58,9 +58,9 @@ def get_social_media_presence(social_url: str):
         force_json_response=True
     )
 
-    # 2. Build the crawler config
+    # 2. Build the crawler config, the page is crawled first and extracted separately so the
+    # gemini stage is only held by the LLM calls, not while the browser loads the page
     crawl_config = CrawlerRunConfig(
-        extraction_strategy=llm_strategy,
         cache_mode=CacheMode.BYPASS
     )
 
@@ -69,32 +69,49 @@ def get_social_media_presence(social_url: str):
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="1 - social_media_screening - Web Craw Initialization completed successfully")) 
 
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="2 - social_media_screening - Retrieving social media data..."))  
+    url = normalize_social_url(social_url)
+    model_name = llm_provider.split("/", 1)[-1]
+
+    def _extract(markdown: str):
+        # 5. Run the LLM extraction over the markdown chunks, as crawl4ai does after a crawl
+        data = llm_strategy.run(url, crawl_config.chunking_strategy.chunk(markdown))
+
+        # crawl4ai reports LLM failures as error blocks, surface quota errors so they are retried
+        for block in data:
+            if isinstance(block, dict) and block.get("error") and is_rate_limit_error(RuntimeError(str(block.get("content")))):
+                raise RuntimeError(str(block.get("content")))
+
+        # 6. Record usage stats of the extraction LLM
+        record_usage(
+            "social_media_screening",
+            model_name,
+            llm_strategy.total_usage.prompt_tokens,
+            llm_strategy.total_usage.completion_tokens
+        )
+
+        return json.loads(json.dumps(data, default=str))
+
     async def _fetch():
         async with AsyncWebCrawler(config=browser_cfg) as crawler:
 
             # 4. Let's say we want to crawl a single page
             result = await crawler.arun(
-                url= normalize_social_url(social_url),
+                url=url,
                 config=crawl_config
             )
 
-            if result.success:
-                
-                print(result.extracted_content)
-
-                print(type(result.extracted_content))
-                # 5. The extracted content is presumably JSON
-                data = json.loads(result.extracted_content)
-
-                # 6. Show usage stats
-                llm_strategy.show_usage()  # prints token usage
+        if not result.success or not result.markdown:
+            print("Error:", result.error_message)
+            return None
 
-                return data
-            else:
-                print("Error:", result.error_message)
+        # The limiter holds the gemini stage for each extraction attempt only and retries quota errors
+        return await get_rate_limiter(model_name).call(
+            lambda: asyncio.to_thread(_extract, result.markdown.raw_markdown),
+            estimated_tokens=estimate_tokens(formatted_user_message, expected_output_tokens=4096),
+            stage="gemini"
+        )
 
-    # Run the async crawl synchronously
-    content = asyncio.run(_fetch())
+    content = await external_call("crawl4ai", {"url": url, "provider": llm_provider, "instruction": formatted_user_message}, _fetch)
 
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - social_media_screening - Retrieving social media data completed successfully"))  
     # (Optionally) trim or process content if needed
@@ -1,10 +1,11 @@
 from app.models.interview_questions import InterviewQAs
-from typing import List, Optional
+from typing import List, Optional, Union
 import numpy as np
 from app.llm_handler.embedder import get_embeddings
-from langchain.tools import tool
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from app.llm_handler.embedder import OpenAIEmbedder
+from app.llm_handler.clients import get_embedder
+from app.database.job_posting_index import job_posting_index
+from app.llm_handler.embedder import normalize_embeddings
 
 from ag_ui.core import (
     RunStartedEvent,
@@ -20,72 +21,97 @@ from ag_ui.core import (
 from langgraph.config import get_stream_writer
 from app.models.job_description import JobDescription
 import json
+import asyncio
 
-embedder = OpenAIEmbedder()
+# Question categories checked against the CV and the job posting
+VALIDATED_CATEGORIES = (
+    "technical_questions",
+    "behavioral_questions",
+    "experience_questions",
+    "situational_questions",
+    "cultural_fit_questions"
+)
+
+def list_questions(interview_questions: InterviewQAs) -> List[dict]:
+    """Validated questions of an InterviewQAs with their category and position within it."""
+    return [
+        {"category": category, "index": index, "question": question}
+        for category in VALIDATED_CATEGORIES
+        for index, question in enumerate(getattr(interview_questions, category))
+    ]
+
+def max_similarities(question_embeddings: np.ndarray, reference_embeddings: Optional[np.ndarray]) -> np.ndarray:
+    """Best cosine similarity of every question with any reference chunk.
+
+    Args:
+        question_embeddings (np.ndarray): Question embeddings of shape (q, d).
+        reference_embeddings (Optional[np.ndarray]): CV or JD chunk embeddings of shape (n, d).
 
-@tool
-def validate_questions_semantically(interview_questions: InterviewQAs, candidate_cv_content: str, job_description: JobDescription, threshold: float = 0.5) -> List[dict]:
+    Returns:
+        np.ndarray: Similarities of shape (q,), zero when there is no reference.
     """
-    Validates the generated interview questions against the candidate's CV and job description.
+    if reference_embeddings is None or reference_embeddings.size == 0:
+        return np.zeros(question_embeddings.shape[0], dtype=np.float32)
+    # One (questions x chunks) matrix product for all questions
+    return (normalize_embeddings(question_embeddings) @ normalize_embeddings(reference_embeddings).T).max(axis=1)
+
+async def embed_cv_chunks(candidate_cv_content: str) -> np.ndarray:
+    """Chunk embeddings of the candidate's CV, computed once and reused for every validation pass.
 
     Args:
-        interview_questions (InterviewQAs): The generated interview questions.
         candidate_cv_content (str): The markdown representation of the candidate's CV.
-        job_description (str): The job description text.
-        threshold (float): Similarity threshold to consider a question valid.
 
     Returns:
-        List[dict]: List of invalid questions with their similarity scores.
+        np.ndarray: Chunk embeddings of shape (n, d).
     """
     writer = get_stream_writer()
+    embedder = get_embedder()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="2 - question_generation - Embedding cv and job description"))  
-    # Split CV and JD into chunks
-    cv_chunks = embedder.chunk_document(candidate_cv_content)
+    cv_chunk_embeddings = await asyncio.to_thread(embedder.embed_text, embedder.chunk_document(candidate_cv_content), "question_generation")
+    writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - question_generation - Embedding cv and job description completed"))  
+    return cv_chunk_embeddings
 
-    # Get embeddings for CV and JD chunks       
-    cv_chunk_embeddings = embedder.embed_text(cv_chunks)
-    
-    hallucinated_questions = []
+async def find_hallucinated_questions(questions: List[dict], cv_chunk_embeddings: np.ndarray, job_description: Union[JobDescription, dict], threshold: float = 0.5) -> List[dict]:
+    """Flag the questions weakly related to both the CV and the job description.
 
-    writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="2 - question_generation - Embedding cv and job description completed"))  
+    Only the given questions are embedded, so a retry re-validates just the replaced ones.
 
-    def cosine_similarity(vec, mat):
-        """
-        vec: shape (1, D)
-        mat: shape (N, D)
-        returns: (N,) cosine similarity between vec and each row in mat
-        """
-        vec_norm = vec / np.linalg.norm(vec)
-        mat_norm = mat / np.linalg.norm(mat, axis=1, keepdims=True)
-        return np.dot(mat_norm, vec_norm.T).flatten()
-
-    all_questions = (
-        interview_questions.technical_questions
-        + interview_questions.behavioral_questions
-        + interview_questions.experience_questions
-        + interview_questions.situational_questions
-        + interview_questions.cultural_fit_questions
-    )
-    
+    Args:
+        questions (List[dict]): Questions as returned by list_questions.
+        cv_chunk_embeddings (np.ndarray): CV chunk embeddings from embed_cv_chunks.
+        job_description (Union[JobDescription, dict]): The job description, as a model or the posting row held in the state.
+        threshold (float): Similarity threshold to consider a question valid.
+
+    Returns:
+        List[dict]: The flagged questions with their similarity scores.
+    """
+    if not questions:
+        return []
+    # Plain helpers get no tool argument conversion, the state holds the posting row as a dict
+    job_description = JobDescription.model_validate(job_description)
+
+    writer = get_stream_writer()
     writer(StepStartedEvent(type=EventType.STEP_STARTED, step_name="3 - question_generation - performing Cosine similarity check on questions"))  
-    q_embedding = np.array(embedder.embed_text(all_questions)).reshape(1, -1)
-
-    jd_vecs = json.loads(job_description.job_postings_vector) if job_description.job_postings_vector is not None else None
-
-    for qa in all_questions:
-        
-        # question_embedding = [get_embeddings(chunk) for chunk in qa_chunks]
-        sim_cv = np.max(cosine_similarity(q_embedding, np.array(cv_chunk_embeddings).reshape(1, -1)))
-        sim_jd = np.max(cosine_similarity(q_embedding, np.array(jd_vecs).reshape(1, -1)))
-
-        # Mark as hallucinated if low similarity to both CV and JD
-        if sim_cv < threshold and sim_jd < threshold:
-            hallucinated_questions.append({
-                "question": qa,
-                "similarity_cv": round(sim_cv, 2),
-                "similarity_jd": round(sim_jd, 2)
-            })
-    
+    # Every question is embedded in the same batched request, one row per question
+    q_embeddings = await asyncio.to_thread(get_embedder().embed_text, [question["question"] for question in questions], "question_generation")
+
+    # The posting vector comes from the resident index, no JSON parsing on this path
+    jd_vecs = job_posting_index.get_vector(job_description.id)
+    if jd_vecs is None and job_description.job_postings_vector:
+        jd_vecs = np.asarray(json.loads(job_description.job_postings_vector), dtype=np.float32).reshape(-1, q_embeddings.shape[1])
+
+    sim_cv = max_similarities(q_embeddings, cv_chunk_embeddings)
+    sim_jd = max_similarities(q_embeddings, jd_vecs)
+
+    # Mark as hallucinated if low similarity to both CV and JD
+    hallucinated_questions = [
+        {
+            **questions[position],
+            "similarity_cv": round(float(sim_cv[position]), 2),
+            "similarity_jd": round(float(sim_jd[position]), 2)
+        }
+        for position in np.flatnonzero((sim_cv < threshold) & (sim_jd < threshold))
+    ]
     writer(StepFinishedEvent(type=EventType.STEP_FINISHED, step_name="3 - question_generation - Cosine similarity check on questions completed"))  
 
-    return hallucinated_questions
\ No newline at end of file
+    return hallucinated_questions
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.database.vector_codec import decode_model_vector, from_bytea
+from app.llm_handler.clients import get_embedder
+from app.vector_index.base import VectorIndex
+from app.vector_index.factory import create_vector_index
+
+load_dotenv(override=True)
+
+CANDIDATE_INDEX_REFRESH_SECONDS = float(os.getenv("CANDIDATE_INDEX_REFRESH_SECONDS", "300"))
+# Exact by default: ranking the talent pool for a posting is one matrix-vector product
+CANDIDATE_INDEX_BACKEND = os.getenv("CANDIDATE_INDEX_BACKEND", "exact")
+
+class CandidateIndex:
+    """Screened candidates searchable by the similarity of their CV vector with a job posting."""
+
+    def __init__(self, refresh_seconds: float = CANDIDATE_INDEX_REFRESH_SECONDS, backend: str = CANDIDATE_INDEX_BACKEND):
+        self.refresh_seconds = refresh_seconds
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._index: Optional[VectorIndex] = None
+        self._candidates: dict[str, dict] = {}
+        self._built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def build(self, candidates: List[dict]) -> None:
+        """Replace the index contents with the given screened candidate rows."""
+        with self._lock:
+            self._index = None
+            self._candidates = {}
+            for candidate in candidates:
+                self.upsert(candidate)
+            self._built_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds
+
+    def upsert(self, candidate: dict) -> None:
+        """Insert a screened candidate row or replace the stored one of the same screening."""
+        if not candidate.get("cv_embedding"):
+            return
+        # CVs embedded by a previous embedding model can't be ranked against the current posting vectors
+        vector = decode_model_vector(from_bytea(candidate["cv_embedding"]), get_embedder().model_name)
+        if vector is None:
+            print(f"Screened candidate {candidate['thread_id']} was embedded by another model, skipped")
+            return
+
+        with self._lock:
+            if self._index is None:
+                self._index = create_vector_index(vector.shape[0], self.backend)
+            self._index.add([str(candidate["thread_id"])], vector.reshape(1, -1))
+            self._candidates[str(candidate["thread_id"])] = {
+                column: value for column, value in candidate.items() if column != "cv_embedding"
+            }
+
+    def search(self, job_posting_vector: np.ndarray, k: int = 10) -> List[Tuple[dict, float]]:
+        """Return the k candidates whose CV is the most similar to a job posting, best first."""
+        with self._lock:
+            index, candidates = self._index, dict(self._candidates)
+        if index is None or not candidates:
+            return []
+
+        return [
+            (candidates[thread_id], score)
+            for thread_id, score in index.search(job_posting_vector.reshape(1, -1), k)[0]
+            if thread_id in candidates
+        ]
+
+candidate_index = CandidateIndex()
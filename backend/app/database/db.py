@@ -2,71 +2,110 @@ from datetime import datetime
 from fastapi import HTTPException
 from supabase import create_client, Client
 import os
+import threading
 from dotenv import load_dotenv
-from app.models.job_description import JobDescriptionCreate
+from app.models.job_description import JobDescription, JobDescriptionCreate
 from app.models.candidate_info import Candidate
 import uuid
 import json
-from app.llm_handler.embedder import OpenAIEmbedder
+from functools import cache
+from app.llm_handler.clients import get_embedder
+from app.llm_handler.embedder import pool_embeddings
+from app.database.job_posting_index import JobPostingIndex, job_posting_index
+from app.database.candidate_index import CandidateIndex, candidate_index
+from app.database.vector_codec import encode_vector, to_bytea
+from app.replay.cassette import external_call_sync
 
 load_dotenv(override=True)
 
 
+# Only one caller rebuilds a stale index, the others wait for it and find it fresh
+_job_posting_index_lock = threading.Lock()
+_candidate_index_lock = threading.Lock()
+
 # Replace with your actual values
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
-if not SUPABASE_KEY or not SUPABASE_URL:
-    raise ValueError("Missing SUPABASE environment variable")
-else:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-openAI_embedder = OpenAIEmbedder()
+@cache
+def get_supabase_client() -> Client:
+    """Create the Supabase client on first use, so replayed runs work without credentials."""
+    if not SUPABASE_KEY or not SUPABASE_URL:
+        raise ValueError("Missing SUPABASE environment variable")
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# Columns returned to the frontend, vectors are only loaded to build the job posting index
+JOB_POSTING_COLUMNS = ",".join(name for name in JobDescription.model_fields if name != "job_postings_vector")
 
 def get_world_check_info(candidate_info:  Candidate):
     try: 
 
         print(candidate_info)
 
-        response = (
-            supabase.table("world_check_reference")
+        rows = external_call_sync(
+            "supabase",
+            {"table": "world_check_reference", "op": "select", "candidate": candidate_info.model_dump(include={"first_name", "last_name", "email", "phone"})},
+            lambda: get_supabase_client().table("world_check_reference")
             .select("*")
             .or_(f"first_name.eq.{candidate_info.first_name},last_name.eq.{candidate_info.last_name},email.eq.{candidate_info.email},phone_number.eq.{candidate_info.phone}")
             .execute()
+            .data
             )
 
-        print(response)
+        print(rows)
 
-        if not response.data:
+        if not rows:
             return 
 
-        return response.data[0]
+        return rows[0]
 
     except Exception as e:
         print(e)
         raise HTTPException(status_code=404, detail="Error connecting to database")
 
-def get_job_postings():
+def get_job_postings(include_vectors: bool = False):
     try: 
 
-        response = supabase.table("job_postings").select("*").execute()
+        columns = "*" if include_vectors else JOB_POSTING_COLUMNS
+        rows = external_call_sync(
+            "supabase",
+            {"table": "job_postings", "op": "select", "columns": columns},
+            lambda: get_supabase_client().table("job_postings").select(columns).execute().data
+        )
 
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=404, detail="No job postings found")
 
-        return response.data
+        return rows
 
     except Exception as e:
         print(e)
         raise HTTPException(status_code=404, detail="Error connecting to database")
 
+def refresh_job_posting_index(force: bool = False) -> JobPostingIndex:
+    """Rebuild the resident job posting index from the database when it is stale."""
+    if force or job_posting_index.is_stale():
+        with _job_posting_index_lock:
+            if force or job_posting_index.is_stale():
+                job_posting_index.build(get_job_postings(include_vectors=True))
+    return job_posting_index
+
+def embed_job_posting(job_posting: JobDescriptionCreate, node_id: str) -> str:
+    """Embed every chunk of a job posting, mean pool them and encode the vector for the bytea column."""
+    openAI_embedder = get_embedder()
+    jb_chunks = openAI_embedder.chunk_document(json.dumps(job_posting.model_dump()))
+    vector = pool_embeddings(openAI_embedder.embed_text(jb_chunks, node_id=node_id), "mean")
+    return to_bytea(encode_vector(vector, openAI_embedder.model_name))
+
 def create_job_posting(job_posting: JobDescriptionCreate):
 
     try:
-        jb_chunks = openAI_embedder.chunk_document(json.dumps(job_posting.model_dump()))
-        jb_embeddings = openAI_embedder.embed_text(jb_chunks)
+        jb_embeddings = embed_job_posting(job_posting, "create_job_posting")
     
-        response = (
-            supabase.table("job_postings")
+        rows = external_call_sync(
+            "supabase",
+            {"table": "job_postings", "op": "insert", "job_posting": job_posting.model_dump()},
+            lambda: get_supabase_client().table("job_postings")
             .insert({ 
                         # "id": str(uuid.uuid4()),
                         "title": job_posting.title, 
@@ -75,17 +114,19 @@ def create_job_posting(job_posting: JobDescriptionCreate):
                         "experience": job_posting.experience, 
                         "skills": job_posting.skills, 
                         "requirements": job_posting.requirements,
-                        "job_postings_vector": jb_embeddings
+                        "job_postings_embedding": jb_embeddings
                         # "createdAt": str(datetime.now()),
                         # "updatedAt": str(datetime.now())
                     })
             .execute()
+            .data
             )
 
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=404, detail="No job descriptions found")
 
-        return response.data[0]   
+        job_posting_index.upsert(rows[0])
+        return rows[0]   
     except Exception as e:
         print(e)
         raise HTTPException(status_code=404, detail="Error connecting to database")
@@ -93,9 +134,13 @@ def create_job_posting(job_posting: JobDescriptionCreate):
 def update_job_posting(id: str ,job_posting: JobDescriptionCreate):
 
     try:
+        # The vector follows the edited contents so matching uses the current posting
+        jb_embeddings = embed_job_posting(job_posting, "update_job_posting")
 
-        response = (
-                supabase.table("job_postings")
+        rows = external_call_sync(
+                "supabase",
+                {"table": "job_postings", "op": "update", "id": id.strip(), "job_posting": job_posting.model_dump()},
+                lambda: get_supabase_client().table("job_postings")
                 .update({ 
                         # "id": str(uuid.uuid4()),
                         "title": job_posting.title, 
@@ -104,17 +149,61 @@ def update_job_posting(id: str ,job_posting: JobDescriptionCreate):
                         "experience": job_posting.experience, 
                         "skills": job_posting.skills, 
                         "requirements": job_posting.requirements,
+                        "job_postings_embedding": jb_embeddings
                         # "createdAt": str(datetime.now()),
                         # "updatedAt": str(datetime.now())
                     })
                 .eq("id", id.strip())
                 .execute()
+                .data
             )
 
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=404, detail="No job descriptions found")
 
-        return response.data[0]   
+        job_posting_index.upsert(rows[0])
+        return rows[0]   
     except Exception as e:
         print(e)
-        raise HTTPException(status_code=404, detail="Error connecting to database")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Error connecting to database")
+
+
+def save_screened_candidate(candidate: dict):
+    """Store, or replace for a resumed thread, a screened candidate with its CV vector and final score."""
+    try:
+        rows = external_call_sync(
+            "supabase",
+            {"table": "screened_candidates", "op": "upsert", "thread_id": candidate["thread_id"]},
+            lambda: get_supabase_client().table("screened_candidates")
+            .upsert(candidate, on_conflict="thread_id")
+            .execute()
+            .data
+        )
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="Screened candidate not stored")
+
+        candidate_index.upsert(rows[0])
+        return rows[0]
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=404, detail="Error connecting to database")
+
+def get_screened_candidates():
+    try:
+        return external_call_sync(
+            "supabase",
+            {"table": "screened_candidates", "op": "select"},
+            lambda: get_supabase_client().table("screened_candidates").select("*").execute().data
+        )
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=404, detail="Error connecting to database")
+
+def refresh_candidate_index(force: bool = False) -> CandidateIndex:
+    """Rebuild the resident screened candidate index from the database when it is stale."""
+    if force or candidate_index.is_stale():
+        with _candidate_index_lock:
+            if force or candidate_index.is_stale():
+                candidate_index.build(get_screened_candidates())
+    return candidate_index
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.llm_handler.clients import get_embedder
+from app.llm_handler.embedder import normalize_embeddings
+from app.database.vector_codec import decode_job_posting_vector
+from app.vector_index.base import VectorIndex
+from app.vector_index.factory import JOB_INDEX_BACKEND, backend_parameters, create_vector_index, load_vector_index
+
+load_dotenv(override=True)
+
+# Each worker only sees its own creates and updates, so the index is rebuilt from the database periodically
+JOB_INDEX_REFRESH_SECONDS = float(os.getenv("JOB_INDEX_REFRESH_SECONDS", "300"))
+# Saved index, reloaded instead of rebuilt while the stored postings are unchanged
+JOB_INDEX_PATH = os.getenv(
+    "JOB_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "job_posting_index")
+)
+# Candidates fetched from approximate backends before exact rescoring
+JOB_INDEX_CANDIDATES = int(os.getenv("JOB_INDEX_CANDIDATES", "50"))
+
+# Columns holding the vector, never kept in the posting rows handed to the workflow
+VECTOR_COLUMNS = ("job_postings_embedding", "job_postings_vector")
+
+def _fingerprint(job_postings: List[dict]) -> str:
+    """Hash of the ids and vectors of the postings, used to tell whether a saved index is current."""
+    digest = hashlib.sha256()
+    for job_posting in sorted(job_postings, key=lambda job_posting: str(job_posting["id"])):
+        digest.update(str(job_posting["id"]).encode("utf-8"))
+        for column in VECTOR_COLUMNS:
+            digest.update(str(job_posting.get(column)).encode("utf-8"))
+    return digest.hexdigest()
+
+class JobPostingIndex:
+    """Job postings searchable by the similarity of their vector with a CV.
+
+    Vectors live in a VectorIndex of the JOB_INDEX_BACKEND backend, exact by default and
+    IVF or HNSW for large catalogues, the posting rows in a dict by id.
+    """
+
+    def __init__(self, refresh_seconds: float = JOB_INDEX_REFRESH_SECONDS, path: str = JOB_INDEX_PATH, backend: str = JOB_INDEX_BACKEND):
+        self.refresh_seconds = refresh_seconds
+        self.path = path
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._index: Optional[VectorIndex] = None
+        self._postings: dict[str, dict] = {}
+        self._built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def build(self, job_postings: List[dict]) -> None:
+        """Replace the index contents with the given job posting rows, reloading the saved index when current.
+
+        The saved index is current when it holds the same postings and was built with the
+        configured backend, parameters and embedding model, so changed IVF_* or HNSW_* settings
+        or a new EMBEDDING_PROVIDER trigger a rebuild.
+        """
+        fingerprint = _fingerprint(job_postings)
+        parameters = backend_parameters(self.backend)
+        model_name = get_embedder().model_name
+        index = None
+        try:
+            # The saved index is a symlink switched by concurrent saves, its metadata and files are read from one version
+            saved_path = os.path.realpath(self.path)
+            metadata = VectorIndex.read_metadata(saved_path)
+            if (
+                metadata.get("fingerprint") == fingerprint
+                and metadata["backend"] == self.backend
+                and metadata.get("parameters") == parameters
+                and metadata.get("model") == model_name
+            ):
+                index = load_vector_index(saved_path)
+        except (OSError, ValueError, KeyError):
+            index = None
+
+        with self._lock:
+            self._index = index
+            self._postings = {}
+            # Binary vectors carry their model, indexed first they fix the width legacy vectors must match
+            for job_posting in sorted(job_postings, key=lambda job_posting: (not job_posting.get("job_postings_embedding"), str(job_posting["id"]))):
+                self.upsert(job_posting, add_vector=index is None)
+            self._built_at = time.monotonic()
+
+            if index is None and self._index is not None:
+                try:
+                    self._index.save(self.path, fingerprint=fingerprint, parameters=parameters, model=model_name)
+                except OSError as e:
+                    print(f"Job posting index not saved: {e}")
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds
+
+    def upsert(self, job_posting: dict, add_vector: bool = True) -> None:
+        """Insert a job posting row or replace the stored one with the same id.
+
+        Postings embedded by another model than the configured embedder are skipped, they are
+        indexed again once re-embedded or migrated. Legacy vectors carry no model, they are
+        skipped when their width differs from the embedder's, or from the indexed vectors' when
+        the embedder's is unknown.
+        """
+        embedder = get_embedder()
+        vector = decode_job_posting_vector(job_posting, embedder.model_name)
+        if vector is None:
+            return
+
+        dims = embedder.dimensions or (self._index.dims if self._index is not None else None)
+        if dims is not None and vector.shape[-1] != dims:
+            print(f"Job posting {job_posting['id']} has a {vector.shape[-1]} dimensions vector, {dims} expected, skipped")
+            return
+        # Postings stored with one vector per chunk are pooled into a single row
+        vector = normalize_embeddings(vector.reshape(-1, vector.shape[-1]).mean(axis=0))
+
+        with self._lock:
+            if self._index is None:
+                self._index = create_vector_index(vector.shape[0], self.backend)
+            if add_vector:
+                self._index.add([str(job_posting["id"])], vector.reshape(1, -1))
+            self._postings[str(job_posting["id"])] = {
+                column: value for column, value in job_posting.items() if column not in VECTOR_COLUMNS
+            }
+
+    def get_vector(self, job_posting_id: str) -> Optional[np.ndarray]:
+        """Normalized vector of a job posting, shape (1, d), None when it is not indexed."""
+        with self._lock:
+            if str(job_posting_id) not in self._postings:
+                return None
+            return self._index.get_vectors([str(job_posting_id)])
+
+    def remove(self, job_posting_id: str) -> None:
+        with self._lock:
+            if self._postings.pop(str(job_posting_id), None) is not None:
+                self._index.remove([str(job_posting_id)])
+
+    def search(self, cv_embeddings: np.ndarray, k: int = 1, pooling: str = "mean") -> List[Tuple[dict, float]]:
+        """Rank the job postings for the chunk embeddings of a CV.
+
+        The score of a posting is the cosine similarity of each CV chunk with the posting,
+        pooled over the chunks with the mean or the max.
+
+        Args:
+            cv_embeddings (np.ndarray): Chunk embeddings of shape (n, d).
+            k (int): Number of postings to return.
+            pooling (str): "mean" or "max".
+
+        Returns:
+            List[Tuple[dict, float]]: Best job postings with their score, best first.
+        """
+        with self._lock:
+            index, postings = self._index, dict(self._postings)
+        if index is None or not postings or cv_embeddings.size == 0:
+            return []
+
+        chunks = normalize_embeddings(cv_embeddings.astype(np.float32, copy=False))
+        if pooling == "max":
+            # Every chunk proposes its nearest postings, which are then scored exactly over all chunks
+            candidate_ids = list(dict.fromkeys(
+                vector_id for results in index.search(chunks, max(k, JOB_INDEX_CANDIDATES)) for vector_id, _ in results
+            ))
+            if not candidate_ids:
+                return []
+            scores = (chunks @ index.get_vectors(candidate_ids).T).max(axis=0)
+            ranked = sorted(zip(candidate_ids, scores.tolist()), key=lambda match: -match[1])[:k]
+        else:
+            # The mean of the chunk similarities is the similarity with the mean chunk
+            mean_chunk = chunks.mean(axis=0)
+            norm = float(np.linalg.norm(mean_chunk))
+            ranked = [(vector_id, score * norm) for vector_id, score in index.search(mean_chunk, k)[0]]
+
+        return [(postings[vector_id], score) for vector_id, score in ranked if vector_id in postings]
+
+job_posting_index = JobPostingIndex()
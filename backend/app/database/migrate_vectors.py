@@ -0,0 +1,55 @@
+"""Fill job_postings_embedding from the legacy JSON job_postings_vector column.
+
+Run migrations/001_job_postings_embedding.sql first, then from the backend directory:
+
+    python -m app.database.migrate_vectors [--dtype float16] [--model text-embedding-3-small]
+
+The model defaults to the one of the configured embedder, pass the model that actually produced
+the legacy vectors when EMBEDDING_PROVIDER changed since.
+"""
+import argparse
+
+from app.database.db import get_supabase_client
+from app.llm_handler.clients import get_embedder
+from app.database.vector_codec import JOB_VECTOR_DTYPE, decode_job_posting_vector, encode_vector, to_bytea
+
+def migrate_job_posting_vectors(model_name: str, dtype: str = JOB_VECTOR_DTYPE) -> int:
+    """Encode the JSON vector of every job posting without a binary one.
+
+    Args:
+        model_name (str): Embedding model the existing vectors were produced with.
+        dtype (str): "float32" or "float16".
+
+    Returns:
+        int: Number of migrated job postings.
+    """
+    supabase = get_supabase_client()
+    rows = (
+        supabase.table("job_postings")
+        .select("id, job_postings_vector")
+        .is_("job_postings_embedding", "null")
+        .execute()
+        .data
+    )
+
+    migrated = 0
+    for row in rows:
+        vector = decode_job_posting_vector(row)
+        if vector is None:
+            print(f"Job posting {row['id']} has no vector, skipped")
+            continue
+
+        supabase.table("job_postings").update({
+            "job_postings_embedding": to_bytea(encode_vector(vector.reshape(-1), model_name, dtype))
+        }).eq("id", row["id"]).execute()
+        migrated += 1
+
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the binary job posting vectors")
+    parser.add_argument("--model", default=None, help="Embedding model of the existing vectors, the configured embedder's by default")
+    parser.add_argument("--dtype", default=JOB_VECTOR_DTYPE, choices=["float32", "float16"])
+    args = parser.parse_args()
+
+    print(f"Migrated {migrate_job_posting_vectors(args.model or get_embedder().model_name, args.dtype)} job postings")
@@ -0,0 +1,4 @@
+-- Binary job posting vectors, encoded by app/database/vector_codec.py:
+-- "HRV1" magic, dtype code, dimensions and embedding model header, then little-endian float32/float16 data.
+-- Existing rows are filled from job_postings_vector with: python -m app.database.migrate_vectors
+alter table job_postings add column if not exists job_postings_embedding bytea;
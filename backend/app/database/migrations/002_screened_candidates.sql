@@ -0,0 +1,13 @@
+-- Candidates kept after their screening, searched by /job/{id}/candidates.
+-- cv_embedding uses the binary vector format of app/database/vector_codec.py.
+create table if not exists screened_candidates (
+    id uuid primary key default gen_random_uuid(),
+    thread_id text not null unique,
+    job_posting_id text,
+    first_name text,
+    last_name text,
+    email text,
+    cv_embedding bytea not null,
+    candidate_final_score jsonb,
+    "createdAt" timestamptz not null default now()
+);
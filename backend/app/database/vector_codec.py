@@ -0,0 +1,92 @@
+import json
+import os
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Precision of newly stored job posting vectors: "float32" or "float16"
+JOB_VECTOR_DTYPE = os.getenv("JOB_VECTOR_DTYPE", "float32")
+
+# Header: magic, dtype code, padding, dimensions, length of the model name, then the model name
+VECTOR_MAGIC = b"HRV1"
+_HEADER = struct.Struct("<4sBxIH")
+_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f2")}
+_DTYPE_CODES = {"float32": 0, "float16": 1}
+
+def encode_vector(vector: np.ndarray, model_name: str, dtype: str = JOB_VECTOR_DTYPE) -> bytes:
+    """Pack a vector into the binary format.
+
+    Args:
+        vector (np.ndarray): One dimensional vector.
+        model_name (str): Embedding model that produced the vector.
+        dtype (str): "float32" or "float16".
+
+    Returns:
+        bytes: Header followed by the little-endian vector data.
+    """
+    code = _DTYPE_CODES[dtype]
+    vector = np.asarray(vector).reshape(-1)
+    model = model_name.encode("utf-8")
+    return _HEADER.pack(VECTOR_MAGIC, code, vector.shape[0], len(model)) + model + vector.astype(_DTYPES[code], copy=False).tobytes()
+
+def decode_vector(blob: bytes) -> Tuple[np.ndarray, str]:
+    """Unpack a vector written by encode_vector.
+
+    float32 vectors are returned as a read-only view of the buffer without copying,
+    float16 ones are widened to float32.
+
+    Returns:
+        Tuple[np.ndarray, str]: The vector and the model that produced it.
+    """
+    magic, code, dims, model_length = _HEADER.unpack_from(blob)
+    if magic != VECTOR_MAGIC:
+        raise ValueError("Not an encoded vector")
+
+    offset = _HEADER.size + model_length
+    model_name = bytes(blob[_HEADER.size:offset]).decode("utf-8")
+    vector = np.frombuffer(blob, dtype=_DTYPES[code], count=dims, offset=offset)
+    if code != 0:
+        vector = vector.astype(np.float32)
+    return vector, model_name
+
+def decode_model_vector(blob: bytes, model_name: str) -> Optional[np.ndarray]:
+    """Unpack a vector written by encode_vector, None when another model produced it.
+
+    Vectors of different models live in unrelated spaces, comparing them gives meaningless scores.
+    """
+    vector, vector_model = decode_vector(blob)
+    return vector if vector_model == model_name else None
+
+def to_bytea(blob: bytes) -> str:
+    """Hex literal PostgREST accepts for a bytea column."""
+    return "\\x" + blob.hex()
+
+def from_bytea(value) -> bytes:
+    """Bytes of a bytea column as returned by PostgREST."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return bytes.fromhex(value[2:] if value.startswith("\\x") else value)
+
+def decode_job_posting_vector(job_posting: dict, model_name: Optional[str] = None) -> Optional[np.ndarray]:
+    """float32 vector of a job posting row, from the binary column or the legacy JSON one.
+
+    With model_name, binary vectors produced by another model are returned as None. Legacy
+    JSON vectors carry no model, callers check their width against the embedder.
+    """
+    embedding = job_posting.get("job_postings_embedding")
+    if embedding:
+        if model_name is None:
+            return decode_vector(from_bytea(embedding))[0]
+        return decode_model_vector(from_bytea(embedding), model_name)
+
+    # Rows not migrated yet by app.database.migrate_vectors, their model is not recorded
+    legacy = job_posting.get("job_postings_vector")
+    if legacy is None or legacy == "":
+        return None
+    if isinstance(legacy, str):
+        legacy = json.loads(legacy)
+    return np.asarray(legacy, dtype=np.float32)
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+from app.models.candidate_info import Candidate
+
+load_dotenv(override=True)
+
+EXTRACTION_CACHE_DIR = os.getenv(
+    "EXTRACTION_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "extraction")
+)
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Changes whenever the Candidate model changes, so stale extractions are never served
+CANDIDATE_SCHEMA_VERSION = hashlib.sha256(
+    json.dumps(Candidate.model_json_schema(), sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+class ExtractionCache:
+    """On-disk cache of Landing AI extractions keyed by the PDF contents and Candidate schema."""
+
+    def __init__(self, cache_dir: str = EXTRACTION_CACHE_DIR, max_bytes: int = EXTRACTION_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, pdf_path: str) -> str:
+        """Compute the cache key of a PDF from the SHA-256 of its bytes and the schema version.
+
+        Args:
+            pdf_path (str): Path to the candidate's CV in PDF format.
+
+        Returns:
+            str: Cache key of the document.
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+
+        return f"{CANDIDATE_SCHEMA_VERSION}-{digest.hexdigest()}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Candidate]:
+        """Return the cached extraction for a key, or None on a miss.
+
+        Args:
+            key (str): Cache key returned by key_for.
+
+        Returns:
+            Optional[Candidate]: Cached candidate information.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                candidate = Candidate.model_validate_json(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Refresh the modification time so eviction drops the least recently used entries first
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return candidate
+
+    def put(self, key: str, candidate: Candidate) -> None:
+        """Store an extraction and evict old entries once the cache exceeds its size budget.
+
+        Args:
+            key (str): Cache key returned by key_for.
+            candidate (Candidate): Extracted candidate information.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(candidate.model_dump_json())
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_bytes -= size
+                except FileNotFoundError:
+                    pass
+
+extraction_cache = ExtractionCache()
@@ -0,0 +1,145 @@
+import os
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Shared guarded import, without PyMuPDF documents are parsed in a single call
+from app.document_extraction.pdf_text import pymupdf
+
+load_dotenv(override=True)
+
+# Pages per range parsed by a single Landing AI call
+LANDING_AI_PAGES_PER_RANGE = int(os.getenv("LANDING_AI_PAGES_PER_RANGE", "2"))
+# Documents shorter than this are parsed in a single call
+LANDING_AI_SPLIT_MIN_PAGES = int(os.getenv("LANDING_AI_SPLIT_MIN_PAGES", "3"))
+
+# Fields holding a single value, taken from the first page range providing one
+SCALAR_FIELDS = (
+    "first_name", "last_name", "name", "email", "phone", "address",
+    "summary", "linkedin_url", "github_url", "x_url"
+)
+
+def split_pdf(pdf_path: str, output_dir: str, pages_per_range: int = LANDING_AI_PAGES_PER_RANGE) -> List[Tuple[str, int, int]]:
+    """Write the page ranges of a PDF to separate files.
+
+    Args:
+        pdf_path (str): Path to the candidate's CV in PDF format.
+        output_dir (str): Directory receiving the range files.
+        pages_per_range (int): Number of pages of each range.
+
+    Returns:
+        List[Tuple[str, int, int]]: Path, first and last page of each range, empty when the
+        document is parsed in a single call.
+    """
+    if pymupdf is None:
+        return []
+
+    with pymupdf.open(pdf_path) as document:
+        if document.page_count < max(LANDING_AI_SPLIT_MIN_PAGES, 2):
+            return []
+
+        ranges = []
+        for first_page in range(0, document.page_count, pages_per_range):
+            last_page = min(first_page + pages_per_range, document.page_count) - 1
+            path = os.path.join(output_dir, f"pages-{first_page}-{last_page}.pdf")
+            with pymupdf.open() as part:
+                part.insert_pdf(document, from_page=first_page, to_page=last_page)
+                part.save(path)
+            ranges.append((path, first_page, last_page))
+
+    return ranges
+
+def merge_pdfs(pdf_paths: List[str], output_path: str) -> str:
+    """Concatenate the PDFs of a multi-document upload, e.g. a CV and its certificates, into one document.
+
+    Args:
+        pdf_paths (List[str]): Paths of the uploaded PDFs, the CV first.
+        output_path (str): Path of the combined PDF.
+
+    Returns:
+        str: output_path.
+    """
+    if pymupdf is None:
+        raise ImportError("Multi-document uploads require the pymupdf package")
+
+    with pymupdf.open() as combined:
+        for pdf_path in pdf_paths:
+            with pymupdf.open(pdf_path) as document:
+                combined.insert_pdf(document)
+        combined.save(output_path)
+    return output_path
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+def _merge_entries(entries: List[dict], key_fields: Tuple[str, ...], list_field: Optional[str] = None) -> List[dict]:
+    """Dedupe entries on their key fields, keeping the first one and the union of its list field.
+
+    Entries cut by a page break are extracted by both ranges, their list items are combined.
+    """
+    merged: dict[tuple, dict] = {}
+    for entry in entries:
+        key = tuple(_normalize(entry.get(field)) for field in key_fields)
+        if key not in merged:
+            merged[key] = {**entry, **({list_field: list(entry.get(list_field) or [])} if list_field else {})}
+            continue
+
+        kept = merged[key]
+        for field, value in entry.items():
+            if field != list_field and not kept.get(field) and value:
+                kept[field] = value
+        if list_field:
+            seen = {_normalize(item) for item in kept[list_field]}
+            for item in entry.get(list_field) or []:
+                if _normalize(item) not in seen:
+                    kept[list_field].append(item)
+                    seen.add(_normalize(item))
+
+    return list(merged.values())
+
+def merge_extractions(parts: List[dict]) -> dict:
+    """Merge the Candidate extractions of the page ranges of a document, in page order.
+
+    Single values come from the first range providing them, list entries are deduped and
+    the markdown of the ranges is concatenated.
+
+    Args:
+        parts (List[dict]): Per range {"extraction": Candidate fields or None, "markdown": str}, in page order.
+
+    Returns:
+        dict: Candidate fields of the whole document.
+    """
+    extractions = [part["extraction"] for part in parts if part.get("extraction")]
+    if not extractions:
+        raise ValueError("No candidate information extracted from any page range")
+
+    merged = {
+        field: next((extraction[field] for extraction in extractions if extraction.get(field)), None)
+        for field in SCALAR_FIELDS
+    }
+
+    skills = {}
+    for extraction in extractions:
+        for skill in extraction.get("skills") or []:
+            skills.setdefault(_normalize(skill), skill)
+    merged["skills"] = list(skills.values())
+
+    merged["experience"] = _merge_entries(
+        [entry for extraction in extractions for entry in extraction.get("experience") or []],
+        ("company", "position"),
+        "responsibilities"
+    )
+    merged["education"] = _merge_entries(
+        [entry for extraction in extractions for entry in extraction.get("education") or []],
+        ("institution", "degree")
+    )
+    merged["social_links"] = _merge_entries(
+        [
+            {**link, "url": (link.get("url") or "").rstrip("/")}
+            for extraction in extractions for link in extraction.get("social_links") or []
+        ],
+        ("url",)
+    )
+    merged["markdown"] = "\n\n".join(part["markdown"] for part in parts if part.get("markdown"))
+
+    return merged
@@ -0,0 +1,145 @@
+import os
+import re
+from collections import Counter
+from typing import List
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+# PyMuPDF is a declared dependency, an environment missing it falls back to Landing AI for every CV
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+    print("pymupdf is not installed, local PDF extraction is disabled and every CV is parsed by Landing AI")
+
+PYMUPDF_AVAILABLE = pymupdf is not None
+
+load_dotenv(override=True)
+
+# Quality gate of the local extraction, documents failing it are parsed by Landing AI
+LOCAL_PDF_MIN_CHARS_PER_PAGE = int(os.getenv("LOCAL_PDF_MIN_CHARS_PER_PAGE", "200"))
+LOCAL_PDF_MAX_UNREADABLE_RATIO = float(os.getenv("LOCAL_PDF_MAX_UNREADABLE_RATIO", "0.02"))
+# Pages with less text than this are counted as scanned
+LOCAL_PDF_EMPTY_PAGE_CHARS = int(os.getenv("LOCAL_PDF_EMPTY_PAGE_CHARS", "20"))
+LOCAL_PDF_MAX_EMPTY_PAGES = int(os.getenv("LOCAL_PDF_MAX_EMPTY_PAGES", "0"))
+
+BULLETS = ("•", "●", "▪", "◦", "‣", "■", "□", "➢", "✓", "-", "*", "–")
+# Bold flag of a PyMuPDF text span
+BOLD_FLAG = 16
+
+# Replacement and private use characters, produced by fonts without a usable unicode mapping
+_UNREADABLE = re.compile("[\ufffd\ue000-\uf8ff]")
+
+class PdfText(BaseModel):
+    """Text layer of a PDF converted to markdown, with the measures of the quality gate"""
+    markdown: str = Field(description="Contents of the PDF in markdown")
+    page_count: int = Field(description="Number of pages of the PDF")
+    char_count: int = Field(description="Number of non whitespace characters extracted")
+    empty_pages: int = Field(description="Number of pages without a text layer, usually scanned ones")
+    unreadable_ratio: float = Field(description="Share of characters without a unicode mapping")
+
+    @property
+    def chars_per_page(self) -> float:
+        return self.char_count / max(self.page_count, 1)
+
+    def is_usable(self) -> bool:
+        """Whether the text layer is good enough to skip Landing AI."""
+        return (
+            self.page_count > 0
+            and self.chars_per_page >= LOCAL_PDF_MIN_CHARS_PER_PAGE
+            and self.unreadable_ratio <= LOCAL_PDF_MAX_UNREADABLE_RATIO
+            and self.empty_pages <= LOCAL_PDF_MAX_EMPTY_PAGES
+        )
+
+def _text_lines(page) -> List[dict]:
+    """Lines of a page in reading order, with their text, font size and boldness."""
+    lines = []
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            lines.append({
+                "text": " ".join("".join(span["text"] for span in line["spans"]).split()),
+                "size": round(max(span["size"] for span in spans), 1),
+                "bold": all(span["flags"] & BOLD_FLAG for span in spans),
+                "block": block["number"]
+            })
+    return lines
+
+def _line_markdown(line: dict, body_size: float) -> str:
+    """Markdown of a line, headings inferred from the font size relative to the body text."""
+    text = line["text"]
+    if text.startswith(BULLETS) and len(text) > 1:
+        return f"- {text.lstrip(''.join(BULLETS)).strip()}"
+    if line["size"] >= body_size * 1.6:
+        return f"# {text}"
+    if line["size"] >= body_size * 1.15:
+        return f"## {text}"
+    if line["bold"] and len(text) <= 80:
+        return f"### {text}"
+    return text
+
+def extract_pdf_text(pdf_path: str) -> PdfText:
+    """Convert the text layer of a PDF to markdown without any remote call.
+
+    Args:
+        pdf_path (str): Path to the candidate's CV in PDF format.
+
+    Returns:
+        PdfText: Markdown of the PDF with the measures of the quality gate.
+    """
+    if pymupdf is None:
+        raise ImportError("Local PDF extraction requires the pymupdf package")
+
+    with pymupdf.open(pdf_path) as document:
+        pages = [(_text_lines(page), page.get_links()) for page in document]
+
+    # The most common font size, weighted by text length, is taken as the body text size
+    sizes = Counter()
+    for lines, _ in pages:
+        for line in lines:
+            sizes[line["size"]] += len(line["text"])
+    body_size = sizes.most_common(1)[0][0] if sizes else 0.0
+
+    sections, links = [], []
+    char_count = unreadable = empty_pages = 0
+    for lines, page_links in pages:
+        page_text = "".join(line["text"] for line in lines)
+        page_chars = len("".join(page_text.split()))
+        char_count += page_chars
+        unreadable += len(_UNREADABLE.findall(page_text))
+        if page_chars < LOCAL_PDF_EMPTY_PAGE_CHARS:
+            empty_pages += 1
+
+        # Lines of the same block stay together, blocks are separated by a blank line
+        markdown_lines, previous_block, pending_bullet = [], None, False
+        for line in lines:
+            # Some layouts put the bullet glyph on its own line, it is attached to the next one
+            if line["text"] in BULLETS:
+                pending_bullet = True
+                continue
+            if previous_block is not None and line["block"] != previous_block and not pending_bullet:
+                markdown_lines.append("")
+            markdown_lines.append(f"- {line['text']}" if pending_bullet else _line_markdown(line, body_size))
+            previous_block, pending_bullet = line["block"], False
+        sections.append("\n".join(markdown_lines))
+
+        # Hyperlinks are often hidden behind labels such as "LinkedIn" or "GitHub"
+        links.extend(link["uri"] for link in page_links if link.get("uri"))
+
+    markdown = "\n\n".join(section for section in sections if section)
+    if links:
+        markdown += "\n\n## Links\n" + "\n".join(f"- {uri}" for uri in dict.fromkeys(links))
+
+    return PdfText(
+        markdown=markdown,
+        page_count=len(pages),
+        char_count=char_count,
+        empty_pages=empty_pages,
+        unreadable_ratio=unreadable / max(char_count, 1)
+    )
+
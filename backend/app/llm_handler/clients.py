@@ -0,0 +1,161 @@
+import os
+import threading
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+from openai import AzureOpenAI
+from langchain_openai import ChatOpenAI
+
+load_dotenv(override=True)
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "https://ai-manuai007693985398858.openai.azure.com/")
+AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
+
+# Embedding backend used for matching and validation: "azure", "local" or "gemini".
+# Stored job posting vectors must be re-embedded after switching, dimensions differ.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "azure")
+
+# Connection pool shared by every LLM and embedding call of the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+_clients_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_azure_openai_client: Optional[AzureOpenAI] = None
+_chat_models: dict[tuple[str, float, int], ChatOpenAI] = {}
+_openai_embedder = None
+_gemini_embedder = None
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+    )
+
+def get_http_client() -> httpx.Client:
+    """Return the shared synchronous HTTP client with a keep-alive connection pool."""
+    global _http_client
+
+    with _clients_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=_pool_limits(), timeout=LLM_HTTP_TIMEOUT)
+        return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared asynchronous HTTP client with a keep-alive connection pool."""
+    global _async_http_client
+
+    with _clients_lock:
+        if _async_http_client is None or _async_http_client.is_closed:
+            _async_http_client = httpx.AsyncClient(limits=_pool_limits(), timeout=LLM_HTTP_TIMEOUT)
+        return _async_http_client
+
+def get_chat_model(model_name: str, temperature: float = 0.5, max_retries: int = 0) -> ChatOpenAI:
+    """Return the shared Gemini chat model for a model name and temperature.
+
+    Args:
+        model_name (str): Gemini model served through the OpenAI compatible endpoint.
+        temperature (float): Sampling temperature.
+        max_retries (int): Retries of the OpenAI SDK, 0 for calls made through app.llm_handler.rate_limiter.
+
+    Returns:
+        ChatOpenAI: Chat model reusing the pooled HTTP clients.
+    """
+    key = (model_name, temperature, max_retries)
+    chat_model = _chat_models.get(key)
+    if chat_model is not None:
+        return chat_model
+
+    http_client = get_http_client()
+    async_http_client = get_async_http_client()
+
+    with _clients_lock:
+        if key not in _chat_models:
+            _chat_models[key] = ChatOpenAI(
+                model=model_name,
+                api_key=os.getenv("GOOGLE_API_KEY"),
+                base_url=GEMINI_BASE_URL,
+                temperature=temperature,
+                # Report token usage on streamed answers too
+                stream_usage=True,
+                # Async calls are retried by app.llm_handler.rate_limiter, which also shrinks concurrency on 429s
+                max_retries=max_retries,
+                http_client=http_client,
+                http_async_client=async_http_client
+            )
+        return _chat_models[key]
+
+def get_azure_openai_client() -> AzureOpenAI:
+    """Return the shared Azure OpenAI client used for embeddings."""
+    global _azure_openai_client
+
+    http_client = get_http_client()
+
+    with _clients_lock:
+        if _azure_openai_client is None:
+            _azure_openai_client = AzureOpenAI(
+                api_version=AZURE_OPENAI_API_VERSION,
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                api_key=os.environ.get("AZURE_API_KEY"),
+                http_client=http_client
+            )
+        return _azure_openai_client
+
+def get_openai_embedder():
+    """Return the shared OpenAIEmbedder backed by the pooled Azure OpenAI client."""
+    global _openai_embedder
+
+    # Imported here because the embedder module pulls in heavy optional dependencies
+    from app.llm_handler.embedder import OpenAIEmbedder
+
+    with _clients_lock:
+        if _openai_embedder is None:
+            # The pooled client is created on the first live call, replays need no AZURE_API_KEY
+            _openai_embedder = OpenAIEmbedder(client_factory=get_azure_openai_client)
+        return _openai_embedder
+
+def get_embedder():
+    """Return the shared embedder of the configured EMBEDDING_PROVIDER."""
+    global _gemini_embedder
+
+    from app.llm_handler.embedder import GeminiEmbedder, get_local_embedder
+    from app.llm_handler.embedding_cache import with_embedding_cache
+
+    if EMBEDDING_PROVIDER == "azure":
+        embedder = get_openai_embedder()
+    elif EMBEDDING_PROVIDER == "local":
+        embedder = get_local_embedder()
+    elif EMBEDDING_PROVIDER == "gemini":
+        with _clients_lock:
+            if _gemini_embedder is None:
+                _gemini_embedder = GeminiEmbedder()
+            embedder = _gemini_embedder
+    else:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER {EMBEDDING_PROVIDER}")
+
+    # Texts already embedded by any worker are served from the shared disk cache
+    return with_embedding_cache(embedder)
+
+async def aclose_clients() -> None:
+    """Close the pooled connections, called when the FastAPI application shuts down."""
+    global _http_client, _async_http_client, _azure_openai_client, _openai_embedder
+
+    with _clients_lock:
+        http_client, async_http_client = _http_client, _async_http_client
+        _http_client = None
+        _async_http_client = None
+        _azure_openai_client = None
+        _openai_embedder = None
+        _chat_models.clear()
+
+    if async_http_client is not None:
+        await async_http_client.aclose()
+    if http_client is not None:
+        http_client.close()
@@ -1,19 +1,80 @@
 
-from typing import List
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Union
 from sentence_transformers import SentenceTransformer
+import numpy as np
 import openai
 
 import google.generativeai
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 import os
+import threading
 from openai import AzureOpenAI
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from openai.types import CreateEmbeddingResponse
+from app.llm_handler.usage_tracker import record_usage
+from app.replay.cassette import external_call_sync
 
 google.generativeai.configure()
 
 USE_OPENAI = False
 
+# Caps of one embeddings request, larger inputs are split over several requests
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "256"))
+EMBEDDING_BATCH_MAX_CHARS = int(os.getenv("EMBEDDING_BATCH_MAX_CHARS", "200000"))
+
+# Local CPU backend: "torch", "onnx" or "onnx-qint8" (int8 quantized ONNX export of the model)
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch")
+LOCAL_EMBEDDING_ONNX_FILE = os.getenv("LOCAL_EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+
+# Vector width of the remote embedding models, used to reject stored vectors of another model
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+    "models/embedding-001": 768,
+}
+
+def batch_texts(texts: List[str], max_inputs: int = EMBEDDING_BATCH_MAX_INPUTS, max_chars: int = EMBEDDING_BATCH_MAX_CHARS) -> List[List[str]]:
+    """Split texts into consecutive batches holding at most max_inputs texts and max_chars characters."""
+    batches, batch, batch_chars = [], [], 0
+    for text in texts:
+        if batch and (len(batch) >= max_inputs or batch_chars + len(text) > max_chars):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """Scale every row to unit length so dot products are cosine similarities."""
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.where(norms == 0, 1, norms)
+
+def pool_embeddings(embeddings: np.ndarray, method: str = "mean", normalize: bool = True) -> np.ndarray:
+    """Pool the chunk embeddings of a document into one vector.
+
+    Args:
+        embeddings (np.ndarray): Chunk embeddings of shape (n, d).
+        method (str): "mean" or "max" pooling over the chunks.
+        normalize (bool): Return a unit length vector.
+
+    Returns:
+        np.ndarray: Pooled vector of shape (d,).
+    """
+    if method == "mean":
+        pooled = embeddings.mean(axis=0)
+    elif method == "max":
+        pooled = embeddings.max(axis=0)
+    else:
+        raise ValueError(f"Unknown pooling method {method}")
+    return normalize_embeddings(pooled) if normalize else pooled
+
 def get_embeddings(text: str) -> List[float]:
     if USE_OPENAI:
         openai.api_key = "your-openai-api-key"  # Replace securely
@@ -25,14 +86,88 @@ def get_embeddings(text: str) -> List[float]:
             return response['data'][0]['embedding']
         return get_embedding(text)
     else:
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        def get_embedding(text: str) -> List[float]:
-            return model.encode(text).tolist()
-        return get_embedding(text)\
+        return get_local_embedder().embed_text(text)[0].tolist()
+
+class Embedder(ABC):
+    """Interface shared by the embedding backends."""
+    model_name: str
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        """Width of the vectors of the model, None when unknown."""
+        return EMBEDDING_DIMENSIONS.get(self.model_name)
+
+    @abstractmethod
+    def embed_text(self, text: Union[str, List[str]], node_id: str = "embedding") -> np.ndarray:
+        """Embed every text and return a float32 matrix of shape (len(text), d)."""
+
+    def chunk_document(self, document: str, chunk_size=2000, chunk_overlap=200):
+        """Split the document into chunks for embedding."""
+        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        return splitter.split_text(document)
+
+class LocalEmbedder(Embedder):
+    """SentenceTransformer running on the CPU, loaded once on first use."""
+
+    def __init__(self,
+                model_name: str = LOCAL_EMBEDDING_MODEL,
+                backend: str = LOCAL_EMBEDDING_BACKEND,
+                batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE
+                ):
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self._model: Optional[SentenceTransformer] = None
+        self._lock = threading.Lock()
 
-class GeminiEmbedder:
+    @property
+    def model(self) -> SentenceTransformer:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if self.backend == "onnx-qint8":
+                        kwargs = {"backend": "onnx", "model_kwargs": {"file_name": LOCAL_EMBEDDING_ONNX_FILE}}
+                    elif self.backend == "onnx":
+                        kwargs = {"backend": "onnx"}
+                    else:
+                        kwargs = {}
+                    self._model = SentenceTransformer(self.model_name, device="cpu", **kwargs)
+        return self._model
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed_text(self, text: Union[str, List[str]], node_id: str = "embedding") -> np.ndarray:
+        texts = [text] if isinstance(text, str) else list(text)
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        embeddings = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return embeddings.astype(np.float32, copy=False)
+
+_local_embedder: Optional[LocalEmbedder] = None
+_local_embedder_lock = threading.Lock()
+
+def get_local_embedder() -> LocalEmbedder:
+    """Return the process-wide LocalEmbedder, so the model weights are loaded only once."""
+    global _local_embedder
+    with _local_embedder_lock:
+        if _local_embedder is None:
+            _local_embedder = LocalEmbedder()
+        return _local_embedder
+
+class GeminiEmbedder(Embedder):
     def __init__(self, model_name: str = "models/embedding-001"):
-        self.client = GoogleGenerativeAIEmbeddings(model=model_name)
+        self.model_name = model_name
+        self._client: Optional[GoogleGenerativeAIEmbeddings] = None
+
+    @property
+    def client(self) -> GoogleGenerativeAIEmbeddings:
+        # Created on first live call, replays served from a cassette need no GOOGLE_API_KEY
+        if self._client is None:
+            self._client = GoogleGenerativeAIEmbeddings(model=self.model_name)
+        return self._client
 
     def embed(self, text: str) -> List[float]:
         return self.client.embed_query(text)
@@ -40,27 +175,66 @@ class GeminiEmbedder:
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         return self.client.embed_documents(texts)
 
-class OpenAIEmbedder:
+    def embed_text(self, text: Union[str, List[str]], node_id: str = "embedding") -> np.ndarray:
+        texts = [text] if isinstance(text, str) else list(text)
+        rows = external_call_sync("embeddings", {"model": self.model_name, "input": texts}, lambda: self.embed_batch(texts))
+        return np.asarray(rows, dtype=np.float32)
+
+class OpenAIEmbedder(Embedder):
     def __init__(self, 
                 model_name: str = "text-embedding-3-small", 
                 deployment: str = "text-embedding-3-small", 
                 api_version: str = "2024-02-01", 
-                endpoint: str = "https://ai-manuai007693985398858.openai.azure.com/"
+                endpoint: str = "https://ai-manuai007693985398858.openai.azure.com/",
+                client: Optional[AzureOpenAI] = None,
+                client_factory: Optional[Callable[[], AzureOpenAI]] = None
                 ):
-        self.client = AzureOpenAI(
-        api_version=api_version,
-        azure_endpoint=endpoint,
-        api_key=os.environ.get("AZURE_API_KEY")
-    )
-
-    def embed_text(self, text: List[str]):
-        resp = self.client.embeddings.create(
-                input=text,
-                model="text-embedding-3-small"
-                )
-        return resp.data[0].embedding
+        self.model_name = model_name
+        self.deployment = deployment
+        self.api_version = api_version
+        self.endpoint = endpoint
+        # Prefer the pooled client from app.llm_handler.clients.get_openai_embedder
+        self._client = client
+        self._client_factory = client_factory
+
+    @property
+    def client(self) -> AzureOpenAI:
+        # Created on first live call, replays served from a cassette need no AZURE_API_KEY
+        if self._client is None:
+            self._client = self._client_factory() if self._client_factory else AzureOpenAI(
+                api_version=self.api_version,
+                azure_endpoint=self.endpoint,
+                api_key=os.environ.get("AZURE_API_KEY")
+            )
+        return self._client
+
+    def embed_text(self, text: Union[str, List[str]], node_id: str = "embedding") -> np.ndarray:
+        """Embed every text, in as few size-capped requests as possible.
+
+        Args:
+            text (Union[str, List[str]]): Text or chunks to embed.
+            node_id (str): Node the usage is recorded for.
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(text), d), one row per text.
+        """
+        texts = [text] if isinstance(text, str) else list(text)
+        rows = []
+
+        for batch in batch_texts(texts):
+            resp = external_call_sync(
+                "embeddings",
+                {"model": self.deployment, "input": batch},
+                lambda: self.client.embeddings.create(
+                    input=batch,
+                    model=self.deployment
+                    ),
+                encode=lambda response: response.model_dump(),
+                decode=CreateEmbeddingResponse.model_validate
+            )
+            if resp.usage is not None:
+                record_usage(node_id, self.model_name, resp.usage.prompt_tokens)
+            rows.extend(item.embedding for item in sorted(resp.data, key=lambda item: item.index))
+
+        return np.asarray(rows, dtype=np.float32)
 
-    def chunk_document(self, document: str, chunk_size=2000, chunk_overlap=200):
-        """Split the document into chunks for embedding."""
-        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        return splitter.split_text(document)
@@ -0,0 +1,276 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.llm_handler.embedder import Embedder
+
+load_dotenv(override=True)
+
+# Embeddings are deterministic for a model, so the cache is on by default
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_DIR = os.getenv(
+    "EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "embeddings")
+)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+# float16 halves the file size, vectors are returned as float32 either way
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+# Access times of hits are written in batches, once this many are pending or the oldest is this old
+EMBEDDING_CACHE_TOUCH_BATCH = int(os.getenv("EMBEDDING_CACHE_TOUCH_BATCH", "256"))
+EMBEDDING_CACHE_TOUCH_INTERVAL = float(os.getenv("EMBEDDING_CACHE_TOUCH_INTERVAL", "30"))
+
+def content_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """Embedding cache keyed by model and content hash.
+
+    Vectors live in one preallocated memory-mapped array file per model, where each cached
+    text owns a fixed slot. A SQLite index maps (model, key) to its slot and last access
+    time; once a model's file is full, the least recently used slot is reused. Slot
+    allocation runs in an immediate SQLite transaction, so uvicorn workers sharing the
+    directory never hand out the same slot twice, and the shared mapping makes a vector
+    written by one worker visible to the others without copying files around.
+
+    Hits don't write to SQLite: their access times are kept in memory and written in
+    batches, so the LRU order other workers see lags by up to EMBEDDING_CACHE_TOUCH_INTERVAL.
+    """
+
+    def __init__(self, cache_dir: str = EMBEDDING_CACHE_DIR, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES, dtype: str = EMBEDDING_CACHE_DTYPE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._vectors: Dict[tuple[str, int], np.memmap] = {}
+        self._stats = {"hits": 0, "misses": 0}
+        self._pending_touches: Dict[tuple[str, str], float] = {}
+        self._touches_since = time.monotonic()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False, timeout=30, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                last_accessed REAL NOT NULL,
+                ready INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (model, key)
+            )"""
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_lru ON embeddings(model, last_accessed)")
+
+    def _vector_file(self, model: str, dims: int) -> np.memmap:
+        """Open, creating it if needed, the vector file of a model."""
+        if (model, dims) not in self._vectors:
+            path = os.path.join(self.cache_dir, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', model)}-{dims}.{self.dtype.name}")
+            size = self.max_entries * dims * self.dtype.itemsize
+            if not os.path.exists(path) or os.path.getsize(path) != size:
+                # Sparse file, disk space is only used by written slots. Appending never
+                # clobbers vectors another worker already wrote.
+                with open(path, "ab") as f:
+                    f.truncate(size)
+                # EMBEDDING_CACHE_MAX_ENTRIES was lowered, forget the slots cut off
+                self._connection.execute("DELETE FROM embeddings WHERE model = ? AND slot >= ?", (model, self.max_entries))
+            self._vectors[(model, dims)] = np.memmap(path, dtype=self.dtype, mode="r+", shape=(self.max_entries, dims))
+        return self._vectors[(model, dims)]
+
+    def get_many(self, model: str, keys: List[str], dims: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return the cached vectors of the keys found in the cache.
+
+        Args:
+            model (str): Embedding model namespace.
+            keys (List[str]): Content keys to look up.
+            dims (Optional[int]): Dimensions of the model, when already known.
+
+        Returns:
+            Dict[str, np.ndarray]: float32 vector per cached key, views of a single block read
+            from the vector file in one gather.
+        """
+        if not keys:
+            return {}
+
+        placeholders = ",".join("?" * len(keys))
+        found = {}
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT key, slot FROM embeddings WHERE model = ? AND ready = 1 AND key IN ({placeholders})", (model, *keys)
+            ).fetchall()
+            dims = dims or self._model_dims(model)
+
+            if rows and dims:
+                # One fancy-indexed read copies every hit out of the shared mapping at once, the
+                # rows handed out are views of that block, never of slots other workers may reuse
+                block = self._vector_file(model, dims)[[slot for _, slot in rows]].astype(np.float32, copy=False)
+                found = {key: block[position] for position, (key, _) in enumerate(rows)}
+
+                # Another worker may have reused a slot while it was read, drop those entries
+                slots = dict(rows)
+                current_slots = dict(self._connection.execute(
+                    f"SELECT key, slot FROM embeddings WHERE model = ? AND ready = 1 AND key IN ({placeholders})", (model, *keys)
+                ).fetchall())
+                found = {key: vector for key, vector in found.items() if current_slots.get(key) == slots[key]}
+
+                now = time.time()
+                for key in found:
+                    self._pending_touches[(model, key)] = now
+                if (
+                    len(self._pending_touches) >= EMBEDDING_CACHE_TOUCH_BATCH
+                    or time.monotonic() - self._touches_since >= EMBEDDING_CACHE_TOUCH_INTERVAL
+                ):
+                    self._flush_touches()
+
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(set(keys)) - len(found)
+
+        return found
+
+    def _flush_touches(self) -> None:
+        """Write the pending access times of hits, called with the lock held."""
+        if self._pending_touches:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_accessed = MAX(last_accessed, ?) WHERE model = ? AND key = ?",
+                [(accessed, model, key) for (model, key), accessed in self._pending_touches.items()]
+            )
+            self._pending_touches.clear()
+        self._touches_since = time.monotonic()
+
+    def _model_dims(self, model: str) -> Optional[int]:
+        for vectors_model, dims in self._vectors:
+            if vectors_model == model:
+                return dims
+
+        pattern = re.compile(rf"^{re.escape(re.sub(r'[^A-Za-z0-9_.-]', '_', model))}-(\d+)\.{self.dtype.name}$")
+        for file_name in os.listdir(self.cache_dir):
+            match = pattern.match(file_name)
+            if match:
+                return int(match.group(1))
+        return None
+
+    def put_many(self, model: str, keys: List[str], vectors: np.ndarray) -> None:
+        """Store vectors, reusing the least recently used slots once the model's file is full.
+
+        Args:
+            model (str): Embedding model namespace.
+            keys (List[str]): Content key of each row of vectors.
+            vectors (np.ndarray): Matrix of shape (len(keys), d).
+        """
+        if not keys:
+            return
+
+        now = time.time()
+        allocated = []
+        with self._lock:
+            file = self._vector_file(model, vectors.shape[1])
+            # Recent hits of this worker must count before a least recently used slot is picked
+            self._flush_touches()
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                count = self._connection.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()[0]
+                for key, vector in zip(keys, vectors):
+                    row = self._connection.execute("SELECT slot, ready FROM embeddings WHERE model = ? AND key = ?", (model, key)).fetchone()
+                    if row is not None:
+                        if row[1]:
+                            continue
+                        # Left pending by a worker that died while writing it
+                        slot = row[0]
+                    else:
+                        # Slots stay dense: free slots are handed out in order, then the LRU one is reused
+                        if count < self.max_entries:
+                            slot = count
+                            count += 1
+                        else:
+                            evicted_key, slot = self._connection.execute(
+                                "SELECT key, slot FROM embeddings WHERE model = ? ORDER BY last_accessed LIMIT 1", (model,)
+                            ).fetchone()
+                            self._connection.execute("DELETE FROM embeddings WHERE model = ? AND key = ?", (model, evicted_key))
+                        self._connection.execute(
+                            "INSERT INTO embeddings (model, key, slot, last_accessed) VALUES (?, ?, ?, ?)", (model, key, slot, now)
+                        )
+                    allocated.append((key, slot, vector))
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+            # Vectors are written once the evicted keys are gone from the index, so a
+            # reader that looked up an evicted key notices the change and drops what it read
+            for key, slot, vector in allocated:
+                file[slot] = vector.astype(self.dtype, copy=False)
+            self._connection.executemany(
+                "UPDATE embeddings SET ready = 1 WHERE model = ? AND key = ?", [(model, key) for key, _, _ in allocated]
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._flush_touches()
+            lookups = self._stats["hits"] + self._stats["misses"]
+            entries = dict(self._connection.execute("SELECT model, COUNT(*) FROM embeddings GROUP BY model").fetchall())
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": entries
+            }
+
+class CachedEmbedder(Embedder):
+    """Embedder answering already embedded texts from the EmbeddingCache."""
+
+    def __init__(self, embedder: Embedder, cache: "EmbeddingCache"):
+        self.embedder = embedder
+        self.cache = cache
+        self.model_name = embedder.model_name
+        # Local backends produce slightly different vectors, they do not share entries
+        backend = getattr(embedder, "backend", None)
+        self.namespace = f"{embedder.model_name}:{backend}" if backend else embedder.model_name
+
+    def embed_text(self, text: Union[str, List[str]], node_id: str = "embedding") -> np.ndarray:
+        texts = [text] if isinstance(text, str) else list(text)
+        if not texts:
+            return self.embedder.embed_text(texts, node_id)
+
+        keys = [content_key(text) for text in texts]
+        vectors = self.cache.get_many(self.namespace, keys)
+
+        # Embed each missing text once, even when it repeats within the request
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            embedded = self.embedder.embed_text(list(missing.values()), node_id)
+            self.cache.put_many(self.namespace, list(missing.keys()), embedded)
+            vectors.update(zip(missing.keys(), embedded))
+
+        return np.stack([vectors[key] for key in keys]).astype(np.float32, copy=False)
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return self.embedder.dimensions
+
+    def chunk_document(self, document: str, chunk_size=2000, chunk_overlap=200):
+        return self.embedder.chunk_document(document, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide embedding cache, or None when EMBEDDING_CACHE_ENABLED is off."""
+    global _embedding_cache
+
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache()
+        return _embedding_cache
+
+def with_embedding_cache(embedder: Embedder) -> Embedder:
+    """Wrap an embedder with the embedding cache when it is enabled."""
+    cache = get_embedding_cache()
+    return embedder if cache is None else CachedEmbedder(embedder, cache)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv(override=True)
+
+# The cache is opt-in: identical prompts only repeat when the same CV is re-screened
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "llm_responses.sqlite")
+)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+_schema_hashes: dict[type[BaseModel], str] = {}
+
+def schema_hash(output_model: type[BaseModel]) -> str:
+    """Hash of the JSON schema of an output model, computed once per model class."""
+    if output_model not in _schema_hashes:
+        _schema_hashes[output_model] = hashlib.sha256(
+            json.dumps(output_model.model_json_schema(), sort_keys=True).encode("utf-8")
+        ).hexdigest()
+    return _schema_hashes[output_model]
+
+class LLMResponseCache:
+    """SQLite cache of validated structured-output responses with TTL and LRU eviction."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                node_id TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed ON llm_responses(last_accessed)")
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(model_name: str, temperature: float, system_message: str, user_message: str, output_model: type[BaseModel]) -> str:
+        """Build the cache key of a structured-output call.
+
+        Args:
+            model_name (str): Model answering the call.
+            temperature (float): Sampling temperature.
+            system_message (str): Formatted system prompt.
+            user_message (str): Formatted user prompt.
+            output_model (type[BaseModel]): Pydantic model the response is parsed into.
+
+        Returns:
+            str: SHA-256 key of the call.
+        """
+        payload = json.dumps({
+            "model": model_name,
+            "temperature": temperature,
+            "system_message": system_message,
+            "user_message": user_message,
+            "output_schema": schema_hash(output_model)
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, node_id: str) -> Optional[dict]:
+        """Return the cached response for a key, or None when missing or expired.
+
+        Args:
+            key (str): Key returned by make_key.
+            node_id (str): Node issuing the call, used for per-node statistics.
+
+        Returns:
+            Optional[dict]: The validated model_dump() stored for the call.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    self._connection.commit()
+                self._stats[node_id]["misses"] += 1
+                return None
+
+            self._connection.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self._stats[node_id]["hits"] += 1
+
+        return json.loads(row[0])
+
+    def put(self, key: str, node_id: str, response: dict) -> None:
+        """Store a validated response and evict the least recently used entries over the limit.
+
+        Args:
+            key (str): Key returned by make_key.
+            node_id (str): Node issuing the call.
+            response (dict): The validated model_dump() of the response.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, node_id, response, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, node_id, json.dumps(response), now, now)
+            )
+            self._connection.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._connection.execute(
+                """DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+            self._connection.commit()
+
+    def stats(self) -> dict:
+        """Hit and miss counts per node since the process started."""
+        with self._lock:
+            return {
+                node_id: {
+                    **counts,
+                    "hit_rate": round(counts["hits"] / (counts["hits"] + counts["misses"]), 3) if counts["hits"] + counts["misses"] else 0.0
+                }
+                for node_id, counts in self._stats.items()
+            }
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None when LLM_CACHE_ENABLED is off."""
+    global _llm_cache
+
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
@@ -28,12 +28,29 @@ google.generativeai.configure()
 # openai_key = "<open-ai-key>"
 # openai.api_key = openai_key
 # model = "gpt-3.5-turbo"
-from ag_ui.core import TextMessageStartEvent, TextMessageContentEvent, TextMessageEndEvent, StepStartedEvent, StepFinishedEvent, EventType
+from ag_ui.core import TextMessageStartEvent, TextMessageContentEvent, TextMessageEndEvent, StepStartedEvent, StepFinishedEvent, CustomEvent, EventType
 from langchain_core.callbacks.base import BaseCallbackHandler
 from langchain_core.callbacks.manager import CallbackManager
 import uuid
 import re
+from pydantic import ValidationError
+from langchain_core.utils.json import parse_partial_json
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.runnables import RunnableConfig
 from langgraph.config import get_stream_writer
+from app.llm_handler.clients import get_chat_model, get_http_client, GEMINI_BASE_URL
+from app.llm_handler.llm_cache import LLMResponseCache, get_llm_cache
+from app.llm_handler.usage_tracker import record_usage
+from app.llm_handler.rate_limiter import get_rate_limiter, estimate_tokens
+from app.llm_handler.model_router import ModelRoute, model_router
+from app.replay.cassette import external_call, external_call_sync
+import asyncio
+from typing import Callable
+
+# SDK retries of connection errors, timeouts, 429s and 5xx answers for the synchronous run_chain
+SYNC_LLM_MAX_RETRIES = int(os.getenv("SYNC_LLM_MAX_RETRIES", "2"))
+# Characters streamed between two partial parses of the answer, at least; the gap grows with the answer
+STREAM_PARSE_MIN_CHARS = int(os.getenv("STREAM_PARSE_MIN_CHARS", "256"))
 
 class AGUIStreamingCallback(BaseCallbackHandler):
     """Streams tokens to AG-UI events in real-time."""
@@ -50,17 +67,22 @@ class AGUIStreamingCallback(BaseCallbackHandler):
                 delta=token
             ))
 
+def strip_code_fences(text: str) -> str:
+    """Remove Markdown code fences (```json ... ```) around a JSON answer, even while it is incomplete."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
 class ChatCompletionHandler:
 
     def __init__(self):
         """Initialize the ChatCompletionHandler with the LLM and prompt template."""
 
-        self.llm = ChatOpenAI(
-            model=model,
-            api_key=google_api_key,
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-            temperature=0.5
-        )
+        self.model_name = model
+        self.temperature = 0.5
 
         self.prompt_template = ChatPromptTemplate.from_messages([
             ("system", "{system_message}"),
@@ -68,6 +90,32 @@ class ChatCompletionHandler:
         ])
 
         self.chain: Runnable | None = None
+
+    @property
+    def llm(self) -> ChatOpenAI:
+        """Shared model instance, its HTTP connection pool is reused across calls.
+
+        Resolved on use, so replays served from a cassette need no GOOGLE_API_KEY. run_chain
+        does not go through the rate limiter, so this model keeps the SDK retries.
+        """
+        return get_chat_model(self.model_name, temperature=self.temperature, max_retries=SYNC_LLM_MAX_RETRIES)
+
+    @staticmethod
+    def _cassette_request(model_name: str, temperature: float, system_message: str, user_message: str, output_model: type[BaseModel]) -> dict:
+        """Request recorded for an LLM call in record/replay mode."""
+        return {
+            "model": model_name,
+            "temperature": temperature,
+            "system_message": system_message,
+            "user_message": user_message,
+            "output_model": output_model.__name__
+        }
+
+    @staticmethod
+    def _record_usage(usage_callback: UsageMetadataCallbackHandler, node_id: str):
+        """Record the token usage collected by the callback for the node."""
+        for model_name, usage in usage_callback.usage_metadata.items():
+            record_usage(node_id, model_name.removeprefix("models/"), usage.get("input_tokens", 0), usage.get("output_tokens", 0))
     
 
     def run_chain(self, system_message: str, user_message: str , output_model: type[BaseModel], node_id: str):
@@ -89,14 +137,231 @@ class ChatCompletionHandler:
             message_id=node_id,
             role="assistant"
         ))
-        self.chain = self.prompt_template | self.llm.with_structured_output(output_model)
+        # Every return path, cache hits and failures included, closes the message it opened
+        try:
+            # Identical prompts for the same model and schema are answered from the cache when enabled
+            cache = get_llm_cache()
+            if cache is not None:
+                cache_key = LLMResponseCache.make_key(self.model_name, self.temperature, system_message, user_message, output_model)
+                cached_response = cache.get(cache_key, node_id)
+                if cached_response is not None:
+                    return cached_response
+
+            usage_callback = UsageMetadataCallbackHandler()
+
+            def _invoke():
+                # The model is only created for live calls, replays don't need its API key
+                self.chain = self.prompt_template | self.llm.with_structured_output(output_model)
+                return self.chain.invoke({
+                    "system_message": system_message,
+                    "user_message": user_message
+                }, config={"callbacks": [usage_callback]})
+
+            try:
+                response = external_call_sync(
+                    "llm",
+                    self._cassette_request(self.model_name, self.temperature, system_message, user_message, output_model),
+                    _invoke,
+                    encode=lambda response: response.model_dump(),
+                    decode=output_model.model_validate
+                )
+            finally:
+                self._record_usage(usage_callback, node_id)
+
+            result = response.model_dump()
+            if cache is not None:
+                cache.put(cache_key, node_id, result)
+
+            return result
+        finally:
+            writer(TextMessageEndEvent(
+                type=EventType.TEXT_MESSAGE_END,
+                message_id=node_id
+            ))
 
-        response = self.chain.invoke({
-            "system_message": system_message,
-            "user_message": user_message
-        })
+    async def _astream_structured(self, llm: ChatOpenAI, chain_input: dict, output_model: type[BaseModel], node_id: str, writer, config: RunnableConfig, first_chunk_timeout: float | None = None, on_first_delta: Callable[[], None] | None = None) -> BaseModel:
+        """
+        Stream the raw JSON answer token by token and parse it into output_model
+
+        Every token is forwarded as a TextMessageContentEvent, the message is opened and closed
+        by arun_chain. When a JSON value completes and
+        enough text arrived since the last parse, the partial answer is parsed and, once it holds
+        a new field of output_model, sent as a partial_structured_output custom event so the
+        frontend can render it before the end. The parse interval grows with the buffer, which
+        keeps the total parsing work linear in the answer length.
 
-        return response.model_dump()
+        An answer that does not match output_model is logged, counted in the model router stats
+        and asked again with tool-calling structured output.
+
+        Args:
+            llm (ChatOpenAI): Chat model answering the call
+            chain_input (dict): System and user messages for the prompt template
+            output_model (pydantic.BaseModel): The Pydantic model class to parse the LLM output.
+            node_id (str): Message id of the AG-UI text message
+            config (RunnableConfig): Run config carrying the usage callback
+            first_chunk_timeout (float | None): Seconds to wait for the first chunk, the rest of the answer is not timed
+            on_first_delta (Callable | None): Called before the first token is sent to the client
+
+        Returns:
+            Parsed output as an instance of output_model.
+        """
+        chain = self.prompt_template | llm
+        buffer = ""
+        streamed_fields = 0
+        parsed_length = 0
+
+        chunks = aiter(chain.astream(chain_input, config=config))
+        # Once the model has started answering it is not timed out, the answer could not be retried on another model
+        first_chunk = await asyncio.wait_for(anext(chunks, None), timeout=first_chunk_timeout)
+
+        async def _chunks():
+            if first_chunk is None:
+                return
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+
+        async for chunk in _chunks():
+            delta = chunk.content if isinstance(chunk.content, str) else ""
+            if not delta:
+                continue
+
+            if not buffer and on_first_delta is not None:
+                on_first_delta()
+            buffer += delta
+            writer(TextMessageContentEvent(
+                type=EventType.TEXT_MESSAGE_CONTENT,
+                message_id=node_id,
+                delta=delta
+            ))
+
+            # Only re-parse when a JSON value may have completed and enough text arrived since the last parse
+            if not any(char in delta for char in ",}]"):
+                continue
+            if len(buffer) - parsed_length < max(STREAM_PARSE_MIN_CHARS, parsed_length // 4):
+                continue
+
+            parsed_length = len(buffer)
+            partial = parse_partial_json(strip_code_fences(buffer))
+            if isinstance(partial, dict):
+                partial = {key: value for key, value in partial.items() if key in output_model.model_fields}
+                if len(partial) > streamed_fields:
+                    streamed_fields = len(partial)
+                    writer(CustomEvent(
+                        type=EventType.CUSTOM,
+                        name="partial_structured_output",
+                        value={"message_id": node_id, "partial": partial}
+                    ))
+
+        try:
+            return output_model.model_validate_json(strip_code_fences(buffer), strict=False)
+        except ValidationError as e:
+            # The free-form answer did not match the schema, fall back to tool-calling structured output
+            print(f"{node_id} - streamed answer of {llm.model_name} does not match {output_model.__name__}, asking again with structured output: {e.error_count()} errors")
+            model_router.record_schema_retry(llm.model_name)
+            return await (self.prompt_template | llm.with_structured_output(output_model)).ainvoke(chain_input, config=config)
+
+    async def arun_chain(self, system_message: str, user_message: str , output_model: type[BaseModel], node_id: str, stream: bool = False, route: str | None = None):
+        """
+        Async variant of run_chain, awaiting the LLM call so the event loop stays free
+
+        The model is picked by app.llm_handler.model_router from the route, which falls back
+        along the route's chain when a model is slow or unavailable.
+
+        Args:
+            system_message (str): Description of the system role for the LLM
+            user_message (str): Description of the user role for the LLM
+            output_model (pydantic.BaseModel): The Pydantic model class to parse the LLM output.
+            node_id (str): Message id of the AG-UI text message
+            stream (bool): Stream tokens and partial results to the frontend while the answer is generated
+            route (str | None): Routing key of the call, defaults to node_id
+
+        Returns:
+            Parsed output as an instance of output_model.
+        """
+
+        writer = get_stream_writer()
+        writer(TextMessageStartEvent(
+            type=EventType.TEXT_MESSAGE_START,
+            message_id=node_id,
+            role="assistant"
+        ))
+        # Every return path, cache hits and failures included, closes the message it opened
+        try:
+            route = route or node_id
+            primary_route = model_router.routes_for(route)[0]
+
+            cache = get_llm_cache()
+            if cache is not None:
+                cache_key = LLMResponseCache.make_key(primary_route.model_name, primary_route.temperature, system_message, user_message, output_model)
+                cached_response = await asyncio.to_thread(cache.get, cache_key, node_id)
+                if cached_response is not None:
+                    return cached_response
+
+            chain_input = {
+                "system_message": system_message,
+                "user_message": user_message
+            }
+
+            usage_callback = UsageMetadataCallbackHandler()
+            config = RunnableConfig(callbacks=[usage_callback])
+            estimated_tokens = estimate_tokens(system_message, user_message)
+
+            # A fallback model would stream a second answer into the same message, so none is tried once tokens went out
+            output_started = False
+
+            def _mark_output_started():
+                nonlocal output_started
+                output_started = True
+
+            async def _call_model(model_route: ModelRoute):
+                # Runs inside the rate limiter slot, so the route's timeout never counts time spent queueing
+                async def _invoke():
+                    # The model is only created for live calls, replays don't need its API key
+                    llm = get_chat_model(model_route.model_name, temperature=model_route.temperature)
+                    if stream:
+                        return await self._astream_structured(
+                            llm, chain_input, output_model, node_id, writer, config,
+                            first_chunk_timeout=model_route.timeout_seconds,
+                            on_first_delta=_mark_output_started
+                        )
+                    chain = self.prompt_template | llm.with_structured_output(output_model)
+                    return await asyncio.wait_for(chain.ainvoke(chain_input, config=config), timeout=model_route.timeout_seconds)
+
+                async def _call():
+                    return await external_call(
+                        "llm",
+                        self._cassette_request(model_route.model_name, model_route.temperature, system_message, user_message, output_model),
+                        _invoke,
+                        encode=lambda response: response.model_dump(),
+                        decode=output_model.model_validate
+                    )
+
+                # The limiter holds the gemini stage, paces calls to the model's quota and retries 429s and transient errors with backoff
+                response = await get_rate_limiter(model_route.model_name).call(
+                    _call,
+                    estimated_tokens=estimated_tokens,
+                    stage="gemini",
+                    can_retry=lambda: not output_started
+                )
+                return model_route, response
+
+            try:
+                answered_route, response = await model_router.call(route, _call_model, can_fall_back=lambda: not output_started)
+            finally:
+                self._record_usage(usage_callback, node_id)
+
+            result = response.model_dump()
+            # Entries are keyed by the primary model, answers of a fallback model are not cached under it
+            if cache is not None and answered_route == primary_route:
+                await asyncio.to_thread(cache.put, cache_key, node_id, result)
+
+            return result
+        finally:
+            writer(TextMessageEndEvent(
+                type=EventType.TEXT_MESSAGE_END,
+                message_id=node_id
+            ))
 
         # """Run LLM with AG-UI streaming events."""
         # callback_manager = CallbackManager([AGUIStreamingCallback(writer, node_id)])
@@ -153,7 +418,8 @@ class ChatCompletionHandler:
         """
         gemini_via_openai_client = OpenAI(
             api_key=google_api_key, 
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+            base_url=GEMINI_BASE_URL,
+            http_client=get_http_client()
         )
 
         messages = [
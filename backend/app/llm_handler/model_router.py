@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, List, TypeVar
+
+import numpy as np
+import openai
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from app.llm_handler.rate_limiter import is_rate_limit_error
+
+load_dotenv(override=True)
+
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gemini-2.5-flash-lite-preview-06-17")
+STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gemini-2.5-flash")
+
+# Number of recent calls per model kept to compute latency percentiles
+LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "500"))
+
+T = TypeVar("T")
+
+class ModelRoute(BaseModel):
+    """One model of a node's fallback chain"""
+    model_name: str = Field(description="Gemini model served through the OpenAI compatible endpoint")
+    temperature: float = Field(default=0.5, description="Sampling temperature")
+    timeout_seconds: float = Field(default=120, description="Time after which the next model of the chain is tried")
+
+# Fallback chain per node id: scoring decisions go to the stronger model,
+# regeneration and summaries to the fast one
+MODEL_ROUTES: dict[str, List[ModelRoute]] = {
+    "cv_scoring": [ModelRoute(model_name=STRONG_MODEL, timeout_seconds=90), ModelRoute(model_name=FAST_MODEL)],
+    "candidate_assessment": [ModelRoute(model_name=STRONG_MODEL, timeout_seconds=90), ModelRoute(model_name=FAST_MODEL)],
+    "question_generation": [ModelRoute(model_name=FAST_MODEL, timeout_seconds=90), ModelRoute(model_name=STRONG_MODEL)],
+    "question_regeneration": [ModelRoute(model_name=FAST_MODEL, timeout_seconds=60), ModelRoute(model_name=STRONG_MODEL)],
+    "report_generation": [ModelRoute(model_name=FAST_MODEL, timeout_seconds=60), ModelRoute(model_name=STRONG_MODEL)],
+    "cv_extraction": [ModelRoute(model_name=FAST_MODEL, temperature=0, timeout_seconds=60), ModelRoute(model_name=STRONG_MODEL, temperature=0)],
+    "project_contribution": [ModelRoute(model_name=FAST_MODEL, timeout_seconds=60), ModelRoute(model_name=STRONG_MODEL)],
+    "default": [ModelRoute(model_name=FAST_MODEL)],
+}
+
+# LLM_MODEL_ROUTES overrides chains, e.g. {"cv_scoring": [{"model_name": "gemini-2.5-pro", "timeout_seconds": 120}]}
+MODEL_ROUTES.update({
+    route_name: [ModelRoute(**route) for route in routes]
+    for route_name, routes in json.loads(os.getenv("LLM_MODEL_ROUTES", "{}")).items()
+})
+
+def is_fallback_error(error: Exception) -> bool:
+    """Whether a failed call should be retried on the next model of the chain."""
+    return (
+        isinstance(error, (TimeoutError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError, openai.NotFoundError))
+        or is_rate_limit_error(error)
+    )
+
+class ModelRouter:
+    """Picks the model chain of a node, falls back along it and records latency per model."""
+
+    def __init__(self, routes: dict[str, List[ModelRoute]] = MODEL_ROUTES):
+        self.routes = routes
+        self._lock = threading.Lock()
+        self._decisions: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._latencies: dict[str, deque] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._failures: dict[str, int] = defaultdict(int)
+        self._schema_retries: dict[str, int] = defaultdict(int)
+
+    def routes_for(self, route_name: str) -> List[ModelRoute]:
+        return self.routes.get(route_name) or self.routes["default"]
+
+    def _record(self, route_name: str, model_name: str, latency: float, succeeded: bool) -> None:
+        with self._lock:
+            if succeeded:
+                self._decisions[route_name][model_name] += 1
+                self._latencies[model_name].append(latency)
+            else:
+                self._failures[model_name] += 1
+
+    def record_schema_retry(self, model_name: str) -> None:
+        """Count a streamed answer that did not match its schema and was asked again with structured output."""
+        with self._lock:
+            self._schema_retries[model_name] += 1
+
+    async def call(self, route_name: str, fn: Callable[[ModelRoute], Awaitable[T]], can_fall_back: Callable[[], bool] = lambda: True) -> T:
+        """Run fn with the first model of the route, falling back to the next one when slow or unavailable.
+
+        fn applies the route's timeout_seconds itself, once it holds its rate limiter slot,
+        so time spent queueing for quota never escalates a call to the next model.
+
+        Args:
+            route_name (str): Node id whose chain is used.
+            fn (Callable): Coroutine factory performing the call with a given model.
+            can_fall_back (Callable): Whether a failed call may still be retried on the next model,
+                false once part of the answer has been sent to the client.
+
+        Returns:
+            The result of the first model that answered.
+        """
+        routes = self.routes_for(route_name)
+
+        for position, model_route in enumerate(routes):
+            start = time.perf_counter()
+            try:
+                result = await fn(model_route)
+            except Exception as e:
+                self._record(route_name, model_route.model_name, time.perf_counter() - start, succeeded=False)
+                if position == len(routes) - 1 or not is_fallback_error(e) or not can_fall_back():
+                    raise
+                print(f"{route_name} - {model_route.model_name} failed ({type(e).__name__}), falling back to {routes[position + 1].model_name}")
+                continue
+
+            self._record(route_name, model_route.model_name, time.perf_counter() - start, succeeded=True)
+            return result
+
+    def stats(self) -> dict:
+        """Routing decisions per node and latency percentiles per model."""
+        with self._lock:
+            models = {}
+            for model_name in set(self._latencies) | set(self._failures) | set(self._schema_retries):
+                latencies = np.array(self._latencies[model_name]) if self._latencies[model_name] else None
+                models[model_name] = {
+                    "calls": 0 if latencies is None else len(latencies),
+                    "failures": self._failures[model_name],
+                    "schema_retries": self._schema_retries[model_name],
+                    "p50_seconds": None if latencies is None else round(float(np.percentile(latencies, 50)), 3),
+                    "p95_seconds": None if latencies is None else round(float(np.percentile(latencies, 95)), 3),
+                }
+
+            return {
+                "routes": {route_name: dict(models_used) for route_name, models_used in self._decisions.items()},
+                "models": models
+            }
+
+model_router = ModelRouter()
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+from functools import cache
+
+from dotenv import load_dotenv
+from langchain.prompts import PromptTemplate
+from pydantic import BaseModel
+
+load_dotenv(override=True)
+
+# Resolved from this file so prompts load regardless of the working directory
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge_base", "scoring_process")
+
+# Seconds between checks for edited prompt files, 0 disables the watcher
+PROMPT_WATCH_INTERVAL = float(os.getenv("PROMPT_WATCH_INTERVAL", "0"))
+
+@cache
+def get_schema(output_model: type[BaseModel]) -> dict:
+    """JSON schema of an output model, generated once per model class."""
+    return output_model.model_json_schema()
+
+@cache
+def get_schema_string(output_model: type[BaseModel]) -> str:
+    """JSON schema of an output model as inserted in the prompts, generated once per model class."""
+    return str(get_schema(output_model))
+
+class PromptRegistry:
+    """Prompt files of the knowledge base loaded once, with their compiled templates and versions."""
+
+    def __init__(self, prompts_dir: str = PROMPTS_DIR):
+        self.prompts_dir = prompts_dir
+        self._lock = threading.Lock()
+        self._texts: dict[str, str] = {}
+        self._templates: dict[str, PromptTemplate] = {}
+        self._versions: dict[str, str] = {}
+        self._mtimes: dict[str, float] = {}
+        self._watcher: threading.Thread | None = None
+        self._stop_watching = threading.Event()
+        self.load()
+
+    def _read(self, name: str, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        with self._lock:
+            self._texts[name] = text
+            # Templates are compiled on first use, plain prompts such as the system message are never compiled
+            self._templates.pop(name, None)
+            self._versions[name] = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+            self._mtimes[name] = os.path.getmtime(path)
+
+    def load(self) -> None:
+        """Load every .txt prompt file of the prompts directory."""
+        for file_name in sorted(os.listdir(self.prompts_dir)):
+            if file_name.endswith(".txt"):
+                self._read(file_name[:-4], os.path.join(self.prompts_dir, file_name))
+
+    def text(self, name: str) -> str:
+        """Raw contents of a prompt file, e.g. text("system_message")."""
+        return self._texts[name]
+
+    def template(self, name: str) -> PromptTemplate:
+        """Compiled PromptTemplate of a prompt file."""
+        with self._lock:
+            if name not in self._templates:
+                self._templates[name] = PromptTemplate.from_template(self._texts[name])
+            return self._templates[name]
+
+    def format(self, name: str, **kwargs) -> str:
+        """Format a prompt template with its variables."""
+        return self.template(name).format(**kwargs)
+
+    @property
+    def version(self) -> str:
+        """Version of the whole prompt set, changes whenever any prompt changes."""
+        with self._lock:
+            combined = "".join(f"{name}:{version}" for name, version in sorted(self._versions.items()))
+        return hashlib.sha256(combined.encode("utf-8")).hexdigest()[:12]
+
+    def versions(self) -> dict:
+        with self._lock:
+            prompts = dict(self._versions)
+        return {"version": self.version, "prompts": prompts}
+
+    def reload_if_changed(self) -> list[str]:
+        """Reload prompt files edited since they were loaded.
+
+        Returns:
+            list[str]: Names of the reloaded prompts.
+        """
+        reloaded = []
+        for file_name in sorted(os.listdir(self.prompts_dir)):
+            if not file_name.endswith(".txt"):
+                continue
+            name, path = file_name[:-4], os.path.join(self.prompts_dir, file_name)
+            if os.path.getmtime(path) != self._mtimes.get(name):
+                self._read(name, path)
+                reloaded.append(name)
+
+        if reloaded:
+            print(f"Reloaded prompts {reloaded}, prompt set version {self.version}")
+        return reloaded
+
+    def start_watching(self, interval: float = PROMPT_WATCH_INTERVAL) -> None:
+        """Poll the prompts directory in a background thread and reload edited files."""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def _watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except OSError as e:
+                    print(f"Prompt reload failed: {e}")
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=_watch, name="prompt-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        self._watcher = None
+
+prompt_registry = PromptRegistry()
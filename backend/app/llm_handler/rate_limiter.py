@@ -0,0 +1,175 @@
+import asyncio
+import os
+import random
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import openai
+from dotenv import load_dotenv
+
+from app.workflow.concurrency import STAGE_LIMITS, stage_limit
+
+load_dotenv(override=True)
+
+# Quotas applied to each Gemini model, shared by every screening running in the process
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1000"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+# Upper bound of the AIMD window, at most the gemini stage limit so the window is what shrinks under 429s
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", str(STAGE_LIMITS["gemini"])))
+
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+# Retries of connection errors, timeouts and 5xx answers, which the HTTP clients no longer retry themselves
+TRANSIENT_MAX_RETRIES = int(os.getenv("TRANSIENT_MAX_RETRIES", "2"))
+RATE_LIMIT_BASE_DELAY = float(os.getenv("RATE_LIMIT_BASE_DELAY", "1.0"))
+RATE_LIMIT_MAX_DELAY = float(os.getenv("RATE_LIMIT_MAX_DELAY", "60.0"))
+
+T = TypeVar("T")
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an exception raised by a provider is a quota (HTTP 429) error."""
+    if isinstance(error, openai.RateLimitError):
+        return True
+    if getattr(error, "status_code", None) == 429:
+        return True
+
+    message = str(error).lower()
+    return "429" in message or "resource_exhausted" in message or "rate limit" in message
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an exception raised by a provider is a connection error, timeout or 5xx answer worth retrying."""
+    if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and status_code >= 500
+
+def estimate_tokens(*texts: str, expected_output_tokens: int = 1024) -> int:
+    """Rough token estimate of a call, about four characters per token plus the expected answer."""
+    return sum(len(text) for text in texts) // 4 + expected_output_tokens
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity units per minute."""
+
+    def __init__(self, capacity_per_minute: int):
+        self.capacity = float(capacity_per_minute)
+        self.available = float(capacity_per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount units are available and take them."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) * 60 / self.capacity)
+
+class AdaptiveRateLimiter:
+    """Per-model limiter combining RPM/TPM token buckets with an AIMD concurrency window.
+
+    Every successful call grows the window by roughly one slot per window of calls, every
+    429 halves it, so concurrency settles just under the level the provider accepts.
+    """
+
+    def __init__(self, model_name: str,
+                 requests_per_minute: int = GEMINI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = GEMINI_TOKENS_PER_MINUTE,
+                 max_in_flight: int = GEMINI_MAX_IN_FLIGHT):
+        self.model_name = model_name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_in_flight = max_in_flight
+        self.concurrency_limit = float(max_in_flight)
+        self.in_flight = 0
+        self.rate_limited_count = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Hold one request slot, waiting for quota and for room in the concurrency window."""
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(1, int(self.concurrency_limit)))
+            self.in_flight += 1
+
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self.concurrency_limit = min(self.max_in_flight, self.concurrency_limit + 1 / self.concurrency_limit)
+
+    def on_rate_limited(self) -> None:
+        self.rate_limited_count += 1
+        self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int, stage: Optional[str] = None, can_retry: Callable[[], bool] = lambda: True) -> T:
+        """Run fn under the limiter, retrying quota and transient errors with full-jitter exponential backoff.
+
+        Args:
+            fn (Callable): Coroutine factory performing the provider call.
+            estimated_tokens (int): Tokens the call is expected to consume.
+            stage (Optional[str]): Stage of app.workflow.concurrency held during each attempt, released while backing off.
+            can_retry (Callable): Whether a failed call may still be retried, false once part of the answer was sent to the client.
+
+        Returns:
+            The result of fn.
+        """
+        transient_retries = 0
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            async with AsyncExitStack() as stack:
+                if stage is not None:
+                    await stack.enter_async_context(stage_limit(stage))
+                await stack.enter_async_context(self.slot(estimated_tokens))
+                try:
+                    result = await fn()
+                except Exception as e:
+                    if attempt == RATE_LIMIT_MAX_RETRIES or not can_retry():
+                        raise
+                    if is_rate_limit_error(e):
+                        self.on_rate_limited()
+                        reason = "Rate limited"
+                    elif is_transient_error(e) and transient_retries < TRANSIENT_MAX_RETRIES:
+                        transient_retries += 1
+                        reason = f"{type(e).__name__}"
+                    else:
+                        raise
+                else:
+                    self.on_success()
+                    return result
+
+            # Back off outside the slot and the stage so other calls can use them meanwhile
+            delay = random.uniform(0, min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** attempt))
+            print(f"{reason} by {self.model_name}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": round(self.concurrency_limit, 2),
+            "in_flight": self.in_flight,
+            "rate_limited_count": self.rate_limited_count
+        }
+
+_rate_limiters: dict[str, AdaptiveRateLimiter] = {}
+
+def get_rate_limiter(model_name: str) -> AdaptiveRateLimiter:
+    """Return the process-wide limiter of a model."""
+    if model_name not in _rate_limiters:
+        _rate_limiters[model_name] = AdaptiveRateLimiter(model_name)
+    return _rate_limiters[model_name]
+
+def rate_limiter_stats() -> dict:
+    return {model_name: limiter.stats() for model_name, limiter in _rate_limiters.items()}
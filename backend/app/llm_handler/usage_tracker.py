@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+from contextvars import ContextVar
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Estimated USD price per million (input, output) tokens, override with the LLM_PRICING json variable
+MODEL_PRICING: dict[str, tuple[float, float]] = {
+    "gemini-2.5-flash-lite-preview-06-17": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+MODEL_PRICING.update({name: tuple(prices) for name, prices in json.loads(os.getenv("LLM_PRICING", "{}")).items()})
+
+def _empty_usage() -> dict:
+    return {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+
+def _add_usage(target: dict, usage: dict) -> None:
+    for key, value in usage.items():
+        target[key] += value
+
+class UsageTracker:
+    """Aggregates token usage and estimated cost per node and per model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: dict[str, dict[str, dict]] = {}
+
+    def record(self, node_id: str, model_name: str, input_tokens: int, output_tokens: int = 0) -> None:
+        """Add the usage of one call.
+
+        Args:
+            node_id (str): Node that issued the call.
+            model_name (str): Model that served the call.
+            input_tokens (int): Prompt tokens.
+            output_tokens (int): Completion tokens.
+        """
+        input_price, output_price = MODEL_PRICING.get(model_name, (0.0, 0.0))
+        usage = {
+            "calls": 1,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "cost_usd": (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        }
+
+        with self._lock:
+            node_usage = self._usage.setdefault(node_id, {})
+            _add_usage(node_usage.setdefault(model_name, _empty_usage()), usage)
+
+    def summary(self) -> dict:
+        """Usage per node, with a per-model breakdown, and the totals of the tracker."""
+        with self._lock:
+            nodes = {}
+            totals = _empty_usage()
+            for node_id, models in self._usage.items():
+                node_totals = _empty_usage()
+                for model_usage in models.values():
+                    _add_usage(node_totals, model_usage)
+                _add_usage(totals, node_totals)
+                nodes[node_id] = {**node_totals, "models": {name: dict(usage) for name, usage in models.items()}}
+
+        for usage in [totals, *nodes.values()]:
+            usage["cost_usd"] = round(usage["cost_usd"], 6)
+
+        return {"nodes": nodes, "totals": totals}
+
+# Usage of the whole process, exposed on the metrics endpoint
+process_usage = UsageTracker()
+
+# Usage of the screening running in the current context; node tasks inherit it from the run
+_run_usage: ContextVar[Optional[UsageTracker]] = ContextVar("run_usage", default=None)
+
+def start_run_usage() -> UsageTracker:
+    """Start tracking the usage of a new screening run in the current context."""
+    tracker = UsageTracker()
+    _run_usage.set(tracker)
+    return tracker
+
+def record_usage(node_id: str, model_name: str, input_tokens: int, output_tokens: int = 0) -> None:
+    """Record the usage of one call for the process and for the current run."""
+    process_usage.record(node_id, model_name, input_tokens, output_tokens)
+
+    run_usage = _run_usage.get()
+    if run_usage is not None:
+        run_usage.record(node_id, model_name, input_tokens, output_tokens)
@@ -1,17 +1,35 @@
 from dotenv import load_dotenv
 import os, asyncio
-from app.workflow.langgraph_workflow import hr_screening_workflow
+from datetime import datetime
+from app.workflow.langgraph_workflow import hr_screening_workflow, resume_screening_workflow, compile_workflow_graph, get_workflow_graph_info, CHECKPOINT_DB_PATH
+from app.workflow.batch_screening import batch_screening_workflow
+from app.workflow.checkpoint_retention import run_checkpoint_retention
 from app.document_extraction.document_extractor import DocumentExtractor
-from app.database.db import update_job_posting, create_job_posting, get_job_postings, get_world_check_info
+from app.document_extraction.page_ranges import merge_pdfs
+from app.llm_handler.clients import aclose_clients
+from app.llm_handler.llm_cache import get_llm_cache
+from app.llm_handler.embedding_cache import get_embedding_cache
+from app.llm_handler.usage_tracker import process_usage
+from app.llm_handler.rate_limiter import rate_limiter_stats
+from app.llm_handler.model_router import model_router
+from app.llm_handler.prompt_registry import prompt_registry
+from app.database.db import update_job_posting, create_job_posting, get_job_postings, get_world_check_info, refresh_job_posting_index, refresh_candidate_index
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import shutil
-from typing import List
+import zipfile
+import io
+import uuid
+from typing import List, Optional
+from contextlib import asynccontextmanager
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
 from app.models.job_description import JobDescription, JobDescriptionCreate
 from app.models.candidate_info import Candidate
 from app.models.world_check import WorldCheck
+from app.models.candidate_match import CandidateMatch
 
 
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploaded_cvs")
@@ -19,10 +37,40 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 load_dotenv(override=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH), exist_ok=True)
+
+    # Checkpoints are stored in SQLite so failed screenings can be resumed, even after a restart
+    async with AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB_PATH) as checkpointer:
+        # Compile the screening graph once so every run reuses the same instance, each run
+        # reports the version and compile time of its graph in a workflow_graph_compiled event
+        compile_workflow_graph(checkpointer=checkpointer)
+
+        # Load the job posting vectors once, screenings then match against the resident index
+        try:
+            index = await asyncio.to_thread(refresh_job_posting_index, True)
+            print(f"Job posting index built with {len(index)} postings")
+        except Exception as e:
+            print(f"Job posting index not built at startup, it will be built on first use: {e}")
+
+        # Delete the checkpoints of old screenings so the database does not grow forever
+        retention_task = asyncio.create_task(run_checkpoint_retention(checkpointer))
+
+        # Pick up edited prompt files without a restart when PROMPT_WATCH_INTERVAL is set
+        prompt_registry.start_watching()
+        yield
+        prompt_registry.stop_watching()
+        retention_task.cancel()
+
+    # Release the pooled LLM and embedding connections
+    await aclose_clients()
+
 app = FastAPI(
     title="HR Screening API",
     description="API to run the HR screening workflow",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Allow CORS for your ReactJS frontend
@@ -92,6 +140,76 @@ def update_job_description(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/job/{job_id}/candidates", response_model=List[CandidateMatch])
+def get_job_candidates(job_id: str, k: int = 10):
+    """Rank every screened candidate for a job posting, without re-screening anyone."""
+    try:
+        job_vector = refresh_job_posting_index().get_vector(job_id)
+        if job_vector is None:
+            raise HTTPException(status_code=404, detail="Job posting not found")
+
+        matches = refresh_candidate_index().search(job_vector, k=k)
+        return [CandidateMatch(**candidate, similarity=similarity) for candidate, similarity in matches]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/workflow/graph")
+def get_workflow_graph_versions():
+    return get_workflow_graph_info()
+
+@app.post("/workflow/graph/recompile")
+def recompile_workflow_graph(version: Optional[str] = None):
+    """Compile the screening graph again under a new version label and make it active for new runs.
+
+    The graph is rebuilt from the code already loaded, code changes still need a restart.
+    In-flight runs keep the graph they started with.
+    """
+    try:
+        compile_event = compile_workflow_graph(version=version or f"v{int(datetime.now().timestamp())}")
+        return compile_event.value
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/metrics/usage")
+def get_usage_metrics():
+    return process_usage.summary()
+
+@app.get("/metrics/models")
+def get_model_metrics():
+    return model_router.stats()
+
+@app.get("/metrics/rate-limits")
+def get_rate_limit_metrics():
+    return rate_limiter_stats()
+
+@app.get("/metrics/llm-cache")
+def get_llm_cache_metrics():
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False, "nodes": {}}
+    return {"enabled": True, "nodes": cache.stats()}
+
+@app.get("/metrics/embedding-cache")
+def get_embedding_cache_metrics():
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/prompts")
+def get_prompt_versions():
+    return prompt_registry.versions()
+
+@app.post("/prompts/reload")
+def reload_prompts():
+    return {"reloaded": prompt_registry.reload_if_changed(), **prompt_registry.versions()}
+
+
 from ag_ui.core import (
     RunStartedEvent,
     RunFinishedEvent,
@@ -113,14 +231,30 @@ async def agui_ws(ws: WebSocket):
     try:
         # Receive uploaded file metadata
         data = await ws.receive_json()
-
-        file_name = data["payload"]["fileName"]
-        file_content = data["payload"]["fileContent"]
-
-        # Save uploaded file
-        file_location = os.path.join(UPLOAD_DIR, file_name)
-        with open(file_location, "wb") as f:
-            f.write(base64.b64decode(file_content))
+        payload = data["payload"]
+
+        # A CV may come with supporting documents such as certificates in "files", the CV first
+        documents = payload.get("files") or [{"fileName": payload["fileName"], "fileContent": payload["fileContent"]}]
+
+        # Save uploaded files under a unique name, the client name is never used as a path
+        file_locations = []
+        for document in documents:
+            file_name = os.path.basename(document["fileName"])
+            if not file_name.lower().endswith(".pdf"):
+                print(f"Skipped {file_name}, only PDF documents are screened")
+                continue
+            file_location = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file_name}")
+            with open(file_location, "wb") as f:
+                f.write(base64.b64decode(document["fileContent"]))
+            file_locations.append(file_location)
+
+        if not file_locations:
+            raise ValueError("No PDF files found in upload")
+
+        # The documents are screened as one PDF, whose page ranges are parsed in parallel
+        file_location = file_locations[0] if len(file_locations) == 1 else await asyncio.to_thread(
+            merge_pdfs, file_locations, os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_combined.pdf")
+        )
 
         async for update in hr_screening_workflow(file_location):
             await ws.send_text( encoder.encode(update))
@@ -141,6 +275,90 @@ async def agui_ws(ws: WebSocket):
         print('error'   , str(e))
 
 
+@app.websocket("/ws/resume-screening")
+async def agui_resume_ws(ws: WebSocket):
+    await ws.accept()
+    try:
+        # Receive the thread id reported by the screening_thread event of the failed run
+        data = await ws.receive_json()
+
+        thread_id = data["payload"]["threadId"]
+
+        async for update in resume_screening_workflow(thread_id):
+            await ws.send_text( encoder.encode(update))
+
+        await ws.close()
+
+    except WebSocketDisconnect:
+        print("Client disconnected")
+    except Exception as e:
+        await ws.send_text(encoder.encode(
+           RunErrorEvent(type=EventType.RUN_ERROR, message=str(e))
+        ))
+        print('error'   , str(e))
+
+
+def save_batch_uploads(batch_dir: str, files: List[tuple[str, bytes]]) -> List[str]:
+    """Write uploaded CVs to disk, expanding zip archives into their PDF members.
+
+    Files that are neither PDFs nor zip archives are skipped.
+
+    Args:
+        batch_dir (str): Directory dedicated to this batch.
+        files (List[tuple[str, bytes]]): File names and contents as uploaded.
+
+    Returns:
+        List[str]: Paths of the PDFs to screen.
+    """
+    pdf_entries = []
+    for file_name, content in files:
+        if file_name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                for member in archive.namelist():
+                    if member.lower().endswith(".pdf") and not member.startswith("__MACOSX"):
+                        pdf_entries.append((member, archive.read(member)))
+        elif file_name.lower().endswith(".pdf"):
+            pdf_entries.append((file_name, content))
+        else:
+            print(f"Skipped {file_name}, only PDF files and zip archives of PDFs are screened")
+
+    pdf_paths = []
+    for index, (file_name, content) in enumerate(pdf_entries):
+        # Prefix with the position so identical names from different folders do not collide
+        file_location = os.path.join(batch_dir, f"{index:04d}_{os.path.basename(file_name)}")
+        with open(file_location, "wb") as f:
+            f.write(content)
+        pdf_paths.append(file_location)
+
+    return pdf_paths
+
+@app.post("/batch/run-screening")
+async def run_batch_screening(files: List[UploadFile] = File(...), max_concurrency: Optional[int] = None):
+    if max_concurrency is not None and max_concurrency < 1:
+        raise HTTPException(status_code=400, detail="max_concurrency must be at least 1")
+
+    try:
+        batch_dir = os.path.join(UPLOAD_DIR, f"batch_{uuid.uuid4()}")
+        os.makedirs(batch_dir, exist_ok=True)
+
+        uploads = [(file.filename, await file.read()) for file in files]
+        pdf_paths = await asyncio.to_thread(save_batch_uploads, batch_dir, uploads)
+
+        if not pdf_paths:
+            raise HTTPException(status_code=400, detail="No PDF files found in upload")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_stream():
+        async for update in batch_screening_workflow(pdf_paths, max_concurrency=max_concurrency):
+            yield encoder.encode(update)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 async def main():
 
     google_api_key = os.environ.get("GOOGLE_API_KEY")
@@ -26,8 +26,8 @@ class SocialLinks(BaseModel):
     platform: str = Field(description="Name of the social media platform in candidate's profile")
     url: str = Field(description="Url to the candidate's social profile on the platform")
 
-class Candidate(BaseModel):
-    """Candidate CV and profile information"""
+class CandidateProfile(BaseModel):
+    """Candidate profile information extracted from a CV"""
     model_config = ConfigDict(extra="ignore")
     
     first_name: str = Field(description="the first name of the candidate")
@@ -44,4 +44,8 @@ class Candidate(BaseModel):
     github_url: Optional[str] = Field(default=None, description="URL to the candidate's Github profile")
     x_url: Optional[str] = Field(default=None, description="URL to the candidate's X/Twitter profile")
     social_links:List[SocialLinks] = Field(description="Social media links pertaining to the candidate")
+
+class Candidate(CandidateProfile):
+    """Candidate CV and profile information"""
+
     markdown: str = Field(description="full contents of pdf in markdown")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field, ConfigDict
+from app.models.candidate_assessment import CandidateFinalScore
+from datetime import datetime
+from typing import Optional
+
+class CandidateMatch(BaseModel):
+    """Screened candidate ranked for a job posting"""
+    model_config = ConfigDict(extra="ignore")
+
+    thread_id: str = Field(description="Id of the screening, usable to resume or inspect it")
+    job_posting_id: Optional[str] = Field(default=None, description="Job posting the candidate was screened for")
+    first_name: Optional[str] = Field(default=None, description="First name of the candidate")
+    last_name: Optional[str] = Field(default=None, description="Last name of the candidate")
+    email: Optional[str] = Field(default=None, description="Email of the candidate")
+    similarity: float = Field(description="Cosine similarity between the candidate's CV and the job posting")
+    candidate_final_score: Optional[CandidateFinalScore] = Field(default=None, description="Final assessment of the candidate's screening")
+    createdAt: Optional[datetime] = Field(default=None, description="Timestamp when the candidate was screened")
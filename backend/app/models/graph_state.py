@@ -23,5 +23,6 @@ class CVProcessingState(TypedDict):
     world_check: Optional[WorldCheck]
     candidate_final_score: CandidateFinalScore
     interview_questions: InterviewQAs
+    cv_embedding: Optional[bytes]
     messages: List[Any]
     error: Annotated[str,operator.add]
\ No newline at end of file
@@ -20,4 +20,17 @@ class InterviewQAs(BaseModel):
     cultural_fit_questions: List[str] = Field(description="Company culture and fit questions")
     areas_to_probe: List[str] = Field(description="Specific areas to investigate based on CV/screening analysis")
     red_flag_questions: List[str] = Field(description="Questions to address any concerns from screening")
-    interview_duration: str = Field(description="Recommended interview duration")
\ No newline at end of file
+    interview_duration: str = Field(description="Recommended interview duration")
+class QuestionReplacement(BaseModel):
+    """Replacement of a single flagged interview question"""
+    model_config = ConfigDict(extra="ignore")
+
+    category: str = Field(description="Category field of the flagged question, e.g. technical_questions")
+    index: int = Field(description="Position of the flagged question within its category")
+    question: str = Field(description="New question replacing the flagged one")
+
+class QuestionReplacements(BaseModel):
+    """Replacements for the interview questions flagged by the semantic validation"""
+    model_config = ConfigDict(extra="ignore")
+
+    replacements: List[QuestionReplacement] = Field(description="One replacement per flagged question")
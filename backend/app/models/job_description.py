@@ -21,4 +21,4 @@ class JobDescription(JobDescriptionCreate):
     id: str = Field(description="Id of job description")
     createdAt: datetime = Field(description="Timestamp when the job description was created")
     updatedAt: Optional[datetime] = Field(description="Timestamp when the job description was last updated")
-    job_postings_vector: Optional[str] = Field(description="vector of Job posting")
\ No newline at end of file
+    job_postings_vector: Optional[str] = Field(default=None, description="Legacy JSON vector of Job posting, vectors are stored in the binary job_postings_embedding column")
\ No newline at end of file
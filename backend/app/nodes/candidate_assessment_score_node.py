@@ -12,7 +12,7 @@ from ag_ui.core import (
 
 from langgraph.config import get_stream_writer
 
-def candidate_assessment_score_node(state: CVProcessingState):
+async def candidate_assessment_score_node(state: CVProcessingState):
 
     """Node to assess candidate based on CV score and social media score.
 
@@ -25,13 +25,18 @@ def candidate_assessment_score_node(state: CVProcessingState):
     writer = get_stream_writer()
     writer(RunStartedEvent(type=EventType.RUN_STARTED, thread_id="Candidate's Final Assessment Process", run_id="candidate_assessment"))
     try:
-        if state.get("error") or not state.get("cv_score"): 
+        if state.get("error"):
+            # One of the enrichment branches failed, its error is already in the state
+            writer(RunErrorEvent(type=EventType.RUN_ERROR, message=f"candidate_assessment - {state['error']}"))
+            return {}
+
+        if not state.get("cv_score"): 
             writer(RunErrorEvent(type=EventType.RUN_ERROR, message="candidate_assessment - No scoring available for this candidate."))
             return {"error": "No scoring available for this candidate."}
        
-        final_score_object = candiate_assessment_process.invoke({
+        final_score_object = await candiate_assessment_process.ainvoke({
             "candidate_cv_score": state["cv_score"],
-            "candidate_social_score": None,
+            "candidate_social_score": state.get("social_media_score"),
             "candidate_world_check_score": state["world_check"]
         })
 
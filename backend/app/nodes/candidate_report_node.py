@@ -12,7 +12,7 @@ from ag_ui.core import (
 
 from langgraph.config import get_stream_writer
 
-def send_report_node(state: CVProcessingState):
+async def send_report_node(state: CVProcessingState):
     """Node to generate candidate report based on CV data and final score.
 
     Args:
@@ -28,7 +28,7 @@ def send_report_node(state: CVProcessingState):
             writer(RunErrorEvent(type=EventType.RUN_ERROR, message="report_generation - No candidate final score available for report generation."))
             return {"error": "No candidate final score available for report generation."}
 
-        candidate_report = generate_candidate_report.invoke({
+        candidate_report = await generate_candidate_report.ainvoke({
             # "candidate_cv_data": state["cv_data"].markdown,
             "candidate_cv_data": state["cv_data"].markdown,
             "candidate_final_score": state["candidate_final_score"]
@@ -12,7 +12,7 @@ from ag_ui.core import (
 
 from langgraph.config import get_stream_writer
 
-def world_check_node(state: CVProcessingState):
+async def world_check_node(state: CVProcessingState):
     """Node to generate candidate report based on CV data and final score.
 
     Args:
@@ -28,7 +28,7 @@ def world_check_node(state: CVProcessingState):
             writer(RunErrorEvent(type=EventType.RUN_ERROR, message="world_check - No candidate info availabe for check."))
             return {"error": "No candidate info availabe for check."}
 
-        candidate_world_check_info = candidate_world_check.invoke({
+        candidate_world_check_info = await candidate_world_check.ainvoke({
             # "candidate_cv_data": state["cv_data"].markdown,
             "candidate_cv_data": state["cv_data"]
         })
@@ -11,7 +11,7 @@ from ag_ui.core import (
     EventType
 )
 
-def cv_scoring_node(state: CVProcessingState):
+async def cv_scoring_node(state: CVProcessingState):
     """Node to score CV against job description.
 
     Args:
@@ -28,7 +28,7 @@ def cv_scoring_node(state: CVProcessingState):
             return {"error": "No CV data available for scoring"}
 
         # Call the async scoring tool with streaming
-        score_result_object = score_cv_against_jd.invoke({
+        score_result_object = await score_cv_against_jd.ainvoke({
             "cv_data" : state["cv_data"].markdown,
             "job_description" : state["job_description"]
         })
@@ -10,7 +10,7 @@ from ag_ui.core import (
 from langgraph.config import get_stream_writer
 
 # Graph nodes
-def landingai_extraction_node(state: CVProcessingState):
+async def landingai_extraction_node(state: CVProcessingState):
     """Node to extract CV data from PDF using LandingAI.
 
     Args:
@@ -29,7 +29,7 @@ def landingai_extraction_node(state: CVProcessingState):
 
         # LandingAI extraction method
         
-        cv_data_object = convert_pdf_to_markdown_landing_ai.invoke({
+        cv_data_object = await convert_pdf_to_markdown_landing_ai.ainvoke({
             "pdf_path" : state["pdf_path"]
         })
                  
@@ -1,6 +1,6 @@
 from app.models.graph_state import CVProcessingState
-from app.agent_tools.interview_questions_tool import generate_interview_questions, regenerate_interview_questions
-from app.agent_tools.validate_questions_tool import validate_questions_semantically
+from app.agent_tools.interview_questions_tool import generate_interview_questions, regenerate_flagged_questions, apply_question_replacements
+from app.agent_tools.validate_questions_tool import embed_cv_chunks, find_hallucinated_questions, list_questions
 from ag_ui.core import (
     RunStartedEvent,
     RunFinishedEvent,
@@ -16,7 +16,7 @@ from langgraph.types import interrupt
 
 MAX_RETRIES = 2
 
-def interview_questions_node(state: CVProcessingState):
+async def interview_questions_node(state: CVProcessingState):
     """Node to generate interview questions based on CV data.
 
     Args:
@@ -35,34 +35,32 @@ def interview_questions_node(state: CVProcessingState):
                 writer(RunErrorEvent(type=EventType.RUN_ERROR, message="question_generation - No cv data available for interview questions."))
                 return {"error": "No cv data available for interview questions."}
             
-            interview_questions_object = generate_interview_questions.invoke({
+            interview_questions_object = await generate_interview_questions.ainvoke({
                 "candidate_cv_content": state["cv_data"].markdown,
                 # "candidate_cv_content": state["cv_data"]["markdown"],
                 "job_description": state["job_description"]
             })
 
             if interview_questions_object:
+                # The CV is embedded once, retries only embed the replaced questions
+                cv_chunk_embeddings = await embed_cv_chunks(state["cv_data"].markdown)
+                hallucinated = await find_hallucinated_questions(list_questions(interview_questions_object), cv_chunk_embeddings, state["job_description"])
                  
-                while retries < MAX_RETRIES:
-                    hallucinated = validate_questions_semantically.invoke({
-                        "interview_questions" : interview_questions_object,
-                        "candidate_cv_content" : state["cv_data"].markdown,
-                        # "candidate_cv_content": state["cv_data"]["markdown"],
-                        "job_description" : state["job_description"]
-                    })
-                                                                                
-                    if not hallucinated:
-                        writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Questions Generation Process", run_id="question_generation", result=interview_questions_object))
-                        return {"interview_questions" : interview_questions_object}
-                    
-                    hallucinated_questions = [hq['question'] for hq in hallucinated]
-                    interview_questions_object = regenerate_interview_questions.invoke({
-                        "interview_questions": interview_questions_object,
-                        "hallucinated_questions": hallucinated_questions,
+                while hallucinated and retries < MAX_RETRIES:
+                    replacements = await regenerate_flagged_questions.ainvoke({
+                        "flagged_questions": hallucinated,
                         "candidate_cv_content": state["cv_data"].markdown,
                         # "candidate_cv_content": state["cv_data"]["markdown"],
                         "job_description": state["job_description"]
                     })
+                    interview_questions_object, replaced = apply_question_replacements(interview_questions_object, hallucinated, replacements)
+
+                    # Questions left unreplaced stay flagged for the next attempt
+                    replaced_keys = {(question["category"], question["index"]) for question in replaced}
+                    hallucinated = [
+                        question for question in hallucinated
+                        if (question["category"], question["index"]) not in replaced_keys
+                    ] + await find_hallucinated_questions(replaced, cv_chunk_embeddings, state["job_description"])
             
                     retries += 1
 
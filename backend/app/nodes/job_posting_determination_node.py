@@ -9,7 +9,7 @@ from ag_ui.core import (
 
 from langgraph.config import get_stream_writer
 
-def job_posting_determination_node(state: CVProcessingState):
+async def job_posting_determination_node(state: CVProcessingState):
 
     writer = get_stream_writer()
     writer(RunStartedEvent(type=EventType.RUN_STARTED, thread_id="Job Posting Determination Process", run_id="job_posting_determination"))
@@ -22,9 +22,10 @@ def job_posting_determination_node(state: CVProcessingState):
             writer(RunErrorEvent(type=EventType.RUN_ERROR, message="job_posting_determination - No job posting available for determination"))
             return {"error": "No job posting available for determination"}
 
-        job_description = determine_job_posting.invoke({
+        job_match = await determine_job_posting.ainvoke({
             "candidate_cv_data" : state["cv_data"].markdown
         })
+        job_description = job_match["job_description"]
 
         if not job_description or job_description is None:
             writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Job Posting Determination Process", run_id="job_posting_determination", result={"note" : "No job posting available for candidate" }))
@@ -39,7 +40,7 @@ def job_posting_determination_node(state: CVProcessingState):
                                                                                                                                                         "description" : job_description["description"],
                                                                                                                                                         "skills" : job_description["skills"],
                                                                                                                                                         "requirements" : job_description["requirements"] }))
-        return {"job_description": job_description}
+        return {"job_description": job_description, "cv_embedding": job_match["cv_embedding"]}
         
     except Exception as e:
         writer(RunErrorEvent(type=EventType.RUN_ERROR, message=f"job_posting_determination - {str(e)}"))
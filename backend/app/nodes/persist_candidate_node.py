@@ -0,0 +1,50 @@
+from app.models.graph_state import CVProcessingState
+from app.database.db import save_screened_candidate
+from app.database.vector_codec import to_bytea
+from langchain_core.runnables import RunnableConfig
+import asyncio
+from ag_ui.core import (
+    RunStartedEvent,
+    RunFinishedEvent,
+    EventType
+)
+
+from langgraph.config import get_stream_writer
+
+async def persist_candidate_node(state: CVProcessingState, config: RunnableConfig):
+    """Node storing the screened candidate's CV vector and final score for reverse search.
+
+    Storing is best effort: a failure is reported but never fails the screening.
+
+    Args:
+        state (CVProcessingState): The current state of the CV processing workflow.
+        config (RunnableConfig): Run config holding the screening thread id.
+
+    Returns:
+        dict: Empty update, the candidate is stored outside the state.
+    """
+    writer = get_stream_writer()
+    writer(RunStartedEvent(type=EventType.RUN_STARTED, thread_id="Candidate Storage Process", run_id="persist_candidate"))
+
+    if state.get("error") or not state.get("cv_embedding"):
+        writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Candidate Storage Process", run_id="persist_candidate", result={"note": "No CV vector available, candidate not stored"}))
+        return {}
+
+    try:
+        cv_data = state["cv_data"]
+        job_description = state.get("job_description")
+        await asyncio.to_thread(save_screened_candidate, {
+            "thread_id": config["configurable"]["thread_id"],
+            "job_posting_id": str(job_description["id"]) if job_description else None,
+            "first_name": cv_data.first_name,
+            "last_name": cv_data.last_name,
+            "email": cv_data.email,
+            "cv_embedding": to_bytea(state["cv_embedding"]),
+            "candidate_final_score": state.get("candidate_final_score")
+        })
+        writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Candidate Storage Process", run_id="persist_candidate", result={"note": "Candidate stored for reverse search"}))
+
+    except Exception as e:
+        writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Candidate Storage Process", run_id="persist_candidate", result={"note": f"Candidate not stored: {str(e)}"}))
+
+    return {}
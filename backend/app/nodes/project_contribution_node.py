@@ -12,7 +12,7 @@ from ag_ui.core import (
 
 from langgraph.config import get_stream_writer
 
-def project_contribution_node(state: CVProcessingState):
+async def project_contribution_node(state: CVProcessingState):
 
     writer = get_stream_writer()
     writer(RunStartedEvent(type=EventType.RUN_STARTED, thread_id="Project Contribution Screening Process", run_id="project_contribution"))
@@ -24,7 +24,7 @@ def project_contribution_node(state: CVProcessingState):
             writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Project Contribution Screening Process", run_id="project_contribution", result = { "note" : "No Github URL available for screening"}))
             return state["messages"].append({"type": "warning", "content": "No Github URL available for screening"})
 
-        project_contributions_dict = get_project_summary.invoke({
+        project_contributions_dict = await get_project_summary.ainvoke({
             "project_url" : state["cv_data"].github_url
             # "project_url" : "https://github.com/Abdul-Muazzam-Deloitte"
         })
@@ -12,7 +12,7 @@ from ag_ui.core import (
 
 from langgraph.config import get_stream_writer
 
-def social_media_screening_node(state: CVProcessingState):
+async def social_media_screening_node(state: CVProcessingState):
     """Node to screen candidate's social media presence.
 
     Args:
@@ -32,7 +32,7 @@ def social_media_screening_node(state: CVProcessingState):
             writer(RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id="Social Media Screening Process", run_id="social_media_screening", result= { "note" : "No LinkedIn URL available for screening"}))
             return state["messages"].append({"type": "warning", "content": "No LinkedIn URL available for screening"})
 
-        social_score_dict = get_social_media_presence.invoke({
+        social_score_dict = await get_social_media_presence.ainvoke({
             "social_url" : state["cv_data"].linkedin_url
             # "social_url" : state["cv_data"]["linkedin_url"]
         })
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# live: call the services, record: call them and write every exchange to the cassette,
+# replay: answer every call from the cassette without touching the network
+EXTERNAL_CALLS_MODE = os.getenv("EXTERNAL_CALLS_MODE", "live").lower()
+CASSETTE_PATH = os.getenv(
+    "CASSETTE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cassettes", "screening.jsonl")
+)
+# Sleep for the recorded latency of each call when replaying, to reproduce a slow run
+REPLAY_INJECT_LATENCY = os.getenv("REPLAY_INJECT_LATENCY", "false").lower() == "true"
+
+if EXTERNAL_CALLS_MODE not in ("live", "record", "replay"):
+    raise ValueError(f"EXTERNAL_CALLS_MODE must be live, record or replay, got {EXTERNAL_CALLS_MODE}")
+
+T = TypeVar("T")
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when a call was never recorded."""
+
+class Cassette:
+    """JSON lines file of recorded external calls, one exchange per line.
+
+    Exchanges are keyed by the service and a hash of the request. Identical requests
+    recorded several times are replayed in the order they were recorded, the last one
+    being repeated once exhausted.
+    """
+
+    def __init__(self, path: str = CASSETTE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._exchanges: Optional[dict[str, list[dict]]] = None
+        self._replayed: dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def make_key(service: str, request: dict) -> str:
+        payload = json.dumps(request, sort_keys=True, default=str)
+        return f"{service}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def _load(self) -> dict[str, list[dict]]:
+        if self._exchanges is None:
+            self._exchanges = defaultdict(list)
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            exchange = json.loads(line)
+                            self._exchanges[exchange["key"]].append(exchange)
+        return self._exchanges
+
+    def lookup(self, service: str, request: dict) -> dict:
+        """Return the next recorded exchange of a request.
+
+        Raises:
+            CassetteMissError: The request is not in the cassette.
+        """
+        key = self.make_key(service, request)
+        with self._lock:
+            exchanges = self._load().get(key)
+            if not exchanges:
+                raise CassetteMissError(f"No recorded {service} call for request {json.dumps(request, default=str)[:200]}")
+            index = min(self._replayed[key], len(exchanges) - 1)
+            self._replayed[key] += 1
+            return exchanges[index]
+
+    def record(self, service: str, request: dict, response: Any, latency_seconds: float) -> None:
+        """Append one exchange to the cassette."""
+        exchange = {
+            "key": self.make_key(service, request),
+            "service": service,
+            "request": request,
+            "response": response,
+            "latency_seconds": round(latency_seconds, 4)
+        }
+        line = json.dumps(exchange, default=str)
+
+        with self._lock:
+            self._load()[exchange["key"]].append(exchange)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+cassette = Cassette()
+
+def _identity(value):
+    return value
+
+async def external_call(service: str, request: dict, fn: Callable[[], Awaitable[T]],
+                        encode: Callable[[T], Any] = _identity, decode: Callable[[Any], T] = _identity) -> T:
+    """Run an external call according to EXTERNAL_CALLS_MODE.
+
+    Args:
+        service (str): Name of the external service, e.g. "llm" or "github".
+        request (dict): JSON serializable description of the request, used as the cassette key.
+        fn (Callable): Coroutine factory performing the live call.
+        encode (Callable): Converts the live response into JSON serializable data.
+        decode (Callable): Rebuilds the response from the recorded data.
+
+    Returns:
+        The live or replayed response.
+    """
+    if EXTERNAL_CALLS_MODE == "replay":
+        exchange = cassette.lookup(service, request)
+        if REPLAY_INJECT_LATENCY:
+            await asyncio.sleep(exchange["latency_seconds"])
+        return decode(exchange["response"])
+
+    if EXTERNAL_CALLS_MODE == "live":
+        return await fn()
+
+    start = time.perf_counter()
+    response = await fn()
+    await asyncio.to_thread(cassette.record, service, request, encode(response), time.perf_counter() - start)
+    return response
+
+def external_call_sync(service: str, request: dict, fn: Callable[[], T],
+                       encode: Callable[[T], Any] = _identity, decode: Callable[[Any], T] = _identity) -> T:
+    """Blocking variant of external_call."""
+    if EXTERNAL_CALLS_MODE == "replay":
+        exchange = cassette.lookup(service, request)
+        if REPLAY_INJECT_LATENCY:
+            time.sleep(exchange["latency_seconds"])
+        return decode(exchange["response"])
+
+    if EXTERNAL_CALLS_MODE == "live":
+        return fn()
+
+    start = time.perf_counter()
+    response = fn()
+    cassette.record(service, request, encode(response), time.perf_counter() - start)
+    return response
+
+def encode_httpx_response(response: httpx.Response) -> dict:
+    return {"status_code": response.status_code, "text": response.text}
+
+def decode_httpx_response(data: dict) -> httpx.Response:
+    return httpx.Response(data["status_code"], text=data["text"])
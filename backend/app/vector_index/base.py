@@ -0,0 +1,118 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """float32 copy of the vectors scaled to unit length, so inner products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+class VectorIndex(ABC):
+    """Cosine similarity index of vectors identified by string ids.
+
+    Backends support incremental inserts and deletes and persist to a directory, so the
+    search runs entirely in process.
+    """
+
+    backend: str
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Insert vectors, replacing the ones already stored under the same ids."""
+
+    @abstractmethod
+    def remove(self, ids: Sequence[str]) -> None:
+        """Delete vectors, unknown ids are ignored."""
+
+    @abstractmethod
+    def get_vectors(self, ids: Sequence[str]) -> np.ndarray:
+        """Normalized stored vectors of the ids, in the same order."""
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        """Return, for each query row, the ids of the k most similar vectors with their cosine similarity."""
+
+    @abstractmethod
+    def _save(self, path: str) -> dict:
+        """Write the backend files to the directory and return the metadata to store with them."""
+
+    @classmethod
+    @abstractmethod
+    def _load(cls, path: str, metadata: dict) -> "VectorIndex":
+        """Rebuild the index from the files written by _save."""
+
+    def save(self, path: str, **extra) -> None:
+        """Persist the index to a directory, extra values are stored in its metadata.
+
+        The files are written to a new version directory and path, a symlink, is switched to it
+        with os.replace, so readers never mix the files of two saves. Writers of every process
+        are serialized by a lock file next to path.
+        """
+        parent, name = os.path.split(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+        with open(os.path.join(parent, f".{name}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            version_dir = tempfile.mkdtemp(prefix=f".{name}-", dir=parent)
+            try:
+                with self._lock:
+                    metadata = {"backend": self.backend, "dims": self.dims, **self._save(version_dir), **extra}
+                with open(os.path.join(version_dir, "metadata.json"), "w", encoding="utf-8") as f:
+                    json.dump(metadata, f)
+
+                link_path = f"{version_dir}.link"
+                os.symlink(os.path.basename(version_dir), link_path)
+                # Indexes saved before versioning are plain directories
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                os.replace(link_path, path)
+            except BaseException:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                raise
+
+            # Replaced versions and leftovers of interrupted saves, no other save runs while the lock is held
+            for entry in os.listdir(parent):
+                entry_path = os.path.join(parent, entry)
+                if entry.startswith(f".{name}-") and entry_path != version_dir:
+                    if os.path.islink(entry_path):
+                        os.remove(entry_path)
+                    else:
+                        shutil.rmtree(entry_path, ignore_errors=True)
+
+    @staticmethod
+    def read_metadata(path: str) -> Dict:
+        with open(os.path.join(path, "metadata.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _check_dims(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if vectors.shape[1] != self.dims:
+            raise ValueError(f"Vectors have {vectors.shape[1]} dimensions, the index holds {self.dims}")
+        return vectors
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
@@ -0,0 +1,107 @@
+import json
+import os
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.vector_index.base import VectorIndex, normalize_rows, top_k
+
+class ExactIndex(VectorIndex):
+    """Brute-force index: one matrix product against every stored vector.
+
+    Vectors are kept normalized in a buffer that doubles when full, deletes move the last
+    row into the freed one so the matrix stays dense.
+    """
+
+    backend = "exact"
+
+    def __init__(self, dims: int):
+        super().__init__(dims)
+        self._vectors = np.zeros((0, dims), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _append(self, vector_id: str, vector: np.ndarray) -> int:
+        row = len(self._ids)
+        if row == self._vectors.shape[0]:
+            grown = np.zeros((max(16, 2 * row), self.dims), dtype=np.float32)
+            grown[:row] = self._vectors[:row]
+            self._vectors = grown
+        self._vectors[row] = vector
+        self._ids.append(vector_id)
+        self._rows[vector_id] = row
+        return row
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = normalize_rows(self._check_dims(vectors))
+        with self._lock:
+            for vector_id, vector in zip(ids, vectors):
+                vector_id = str(vector_id)
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = self._append(vector_id, vector)
+                else:
+                    self._vectors[row] = vector
+                self._on_update(vector_id, row)
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for vector_id in ids:
+                row = self._rows.pop(str(vector_id), None)
+                if row is None:
+                    continue
+                self._on_remove(row)
+                last = len(self._ids) - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = self._ids[last]
+                    self._rows[self._ids[row]] = row
+                    self._on_move(last, row)
+                self._ids.pop()
+
+    # Hooks for indexes keeping structures over the rows
+    def _on_update(self, vector_id: str, row: int) -> None:
+        pass
+
+    def _on_remove(self, row: int) -> None:
+        pass
+
+    def _on_move(self, old_row: int, new_row: int) -> None:
+        pass
+
+    def get_vectors(self, ids: Sequence[str]) -> np.ndarray:
+        with self._lock:
+            return self._vectors[[self._rows[str(vector_id)] for vector_id in ids]].copy()
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        queries = normalize_rows(self._check_dims(queries))
+        with self._lock:
+            count = len(self._ids)
+            scores = queries @ self._vectors[:count].T
+            ids = list(self._ids)
+
+        return [
+            [(ids[row], float(query_scores[row])) for row in top_k(query_scores, k)]
+            for query_scores in scores
+        ]
+
+    def _save(self, path: str) -> dict:
+        np.save(os.path.join(path, "vectors.npy"), self._vectors[:len(self._ids)])
+        with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(self._ids, f)
+        return {}
+
+    @classmethod
+    def _load(cls, path: str, metadata: dict) -> "ExactIndex":
+        index = cls(metadata["dims"])
+        vectors = np.load(os.path.join(path, "vectors.npy"))
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+
+        index._vectors = vectors.astype(np.float32, copy=False)
+        index._ids = ids
+        index._rows = {vector_id: row for row, vector_id in enumerate(ids)}
+        return index
@@ -0,0 +1,63 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.vector_index.base import VectorIndex
+from app.vector_index.exact import ExactIndex
+from app.vector_index.hnsw import HNSWIndex
+from app.vector_index.ivf import IVFIndex
+
+load_dotenv(override=True)
+
+# Backend of the job posting index: "exact", "ivf" or "hnsw"
+JOB_INDEX_BACKEND = os.getenv("JOB_INDEX_BACKEND", "exact")
+
+# Recall/latency parameters of the approximate backends
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0")) or None
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+IVF_MIN_TRAIN_SIZE = int(os.getenv("IVF_MIN_TRAIN_SIZE", "1024"))
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+_BACKENDS: dict[str, type[VectorIndex]] = {
+    ExactIndex.backend: ExactIndex,
+    IVFIndex.backend: IVFIndex,
+    HNSWIndex.backend: HNSWIndex,
+}
+
+def backend_parameters(backend: Optional[str] = None) -> dict:
+    """Configured recall/latency parameters of a backend, a saved index built with others is not reused."""
+    backend = backend or JOB_INDEX_BACKEND
+    if backend == "ivf":
+        return {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE, "min_train_size": IVF_MIN_TRAIN_SIZE}
+    if backend == "hnsw":
+        return {"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": HNSW_EF_SEARCH}
+    return {}
+
+def create_vector_index(dims: int, backend: Optional[str] = None) -> VectorIndex:
+    """Create an empty index of the configured backend.
+
+    Args:
+        dims (int): Dimensions of the indexed vectors.
+        backend (Optional[str]): "exact", "ivf" or "hnsw", defaults to JOB_INDEX_BACKEND.
+
+    Returns:
+        VectorIndex: The empty index.
+    """
+    backend = backend or JOB_INDEX_BACKEND
+    if backend == "exact":
+        return ExactIndex(dims)
+    if backend == "ivf":
+        return IVFIndex(dims, **backend_parameters(backend))
+    if backend == "hnsw":
+        return HNSWIndex(dims, **backend_parameters(backend))
+    raise ValueError(f"Unknown vector index backend {backend}")
+
+def load_vector_index(path: str) -> VectorIndex:
+    """Load an index saved with VectorIndex.save, whatever its backend."""
+    # Resolved once, a concurrent save switching the symlink does not affect this load
+    path = os.path.realpath(path)
+    metadata = VectorIndex.read_metadata(path)
+    return _BACKENDS[metadata["backend"]]._load(path, metadata)
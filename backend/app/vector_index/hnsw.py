@@ -0,0 +1,109 @@
+import json
+import os
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.vector_index.base import VectorIndex, normalize_rows
+
+# hnswlib is optional, the exact and IVF backends only need NumPy
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+class HNSWIndex(VectorIndex):
+    """Hierarchical navigable small world graph index backed by hnswlib.
+
+    m and ef_construction set the graph quality at build time, ef_search the recall and
+    latency of queries. Deleted vectors are marked deleted and their slots reused by later inserts.
+    """
+
+    backend = "hnsw"
+
+    def __init__(self, dims: int, m: int = 16, ef_construction: int = 200, ef_search: int = 64, initial_capacity: int = 1024):
+        if hnswlib is None:
+            raise ImportError("The hnsw vector index backend requires the hnswlib package")
+        super().__init__(dims)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = hnswlib.Index(space="ip", dim=dims)
+        self._index.init_index(max_elements=initial_capacity, M=m, ef_construction=ef_construction, allow_replace_deleted=True)
+        self._index.set_ef(ef_search)
+        self._labels: dict[str, int] = {}
+        self._ids: dict[int, str] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = normalize_rows(self._check_dims(vectors))
+        with self._lock:
+            labels = []
+            for vector_id in ids:
+                vector_id = str(vector_id)
+                label = self._labels.get(vector_id)
+                if label is None:
+                    label = self._next_label
+                    self._next_label += 1
+                    self._labels[vector_id] = label
+                    self._ids[label] = vector_id
+                labels.append(label)
+
+            needed = self._index.get_current_count() + len(labels)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+            self._index.add_items(vectors, np.asarray(labels, dtype=np.int64), replace_deleted=True)
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for vector_id in ids:
+                label = self._labels.pop(str(vector_id), None)
+                if label is not None:
+                    self._index.mark_deleted(label)
+                    del self._ids[label]
+
+    def get_vectors(self, ids: Sequence[str]) -> np.ndarray:
+        with self._lock:
+            labels = [self._labels[str(vector_id)] for vector_id in ids]
+            return np.asarray(self._index.get_items(labels), dtype=np.float32).reshape(len(labels), self.dims)
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        queries = normalize_rows(self._check_dims(queries))
+        with self._lock:
+            k = min(k, len(self))
+            if k == 0:
+                return [[] for _ in queries]
+            self._index.set_ef(max(self.ef_search, k))
+            labels, distances = self._index.knn_query(queries, k=k)
+            ids = dict(self._ids)
+
+        # The inner product space returns 1 - similarity as the distance
+        return [
+            [(ids[int(label)], float(1 - distance)) for label, distance in zip(query_labels, query_distances) if int(label) in ids]
+            for query_labels, query_distances in zip(labels, distances)
+        ]
+
+    def _save(self, path: str) -> dict:
+        self._index.save_index(os.path.join(path, "hnsw.bin"))
+        with open(os.path.join(path, "labels.json"), "w", encoding="utf-8") as f:
+            json.dump(self._labels, f)
+        return {
+            "m": self.m,
+            "ef_construction": self.ef_construction,
+            "ef_search": self.ef_search,
+            "next_label": self._next_label
+        }
+
+    @classmethod
+    def _load(cls, path: str, metadata: dict) -> "HNSWIndex":
+        index = cls(metadata["dims"], m=metadata["m"], ef_construction=metadata["ef_construction"], ef_search=metadata["ef_search"])
+        index._index.load_index(os.path.join(path, "hnsw.bin"), allow_replace_deleted=True)
+        index._index.set_ef(index.ef_search)
+        with open(os.path.join(path, "labels.json"), "r", encoding="utf-8") as f:
+            index._labels = json.load(f)
+        index._ids = {label: vector_id for vector_id, label in index._labels.items()}
+        index._next_label = metadata["next_label"]
+        return index
@@ -0,0 +1,140 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.vector_index.base import normalize_rows, top_k
+from app.vector_index.exact import ExactIndex
+
+class IVFIndex(ExactIndex):
+    """Inverted file index: vectors are clustered with spherical k-means and a query only
+    scores the vectors of its nprobe closest clusters.
+
+    Until min_train_size vectors are stored the index searches exhaustively. It retrains
+    once it grows to retrain_factor times the size it was trained on. Raising nprobe
+    trades latency for recall, nprobe == nlist is an exact search.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, dims: int, nlist: Optional[int] = None, nprobe: int = 8, min_train_size: int = 1024,
+                 train_iterations: int = 10, retrain_factor: float = 4.0):
+        super().__init__(dims)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.train_iterations = train_iterations
+        self.retrain_factor = retrain_factor
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[set] = []
+        self._trained_size = 0
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            super().add(ids, vectors)
+            if len(self) >= self.min_train_size and (
+                self._centroids is None or len(self) > self.retrain_factor * self._trained_size
+            ):
+                self.train()
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def train(self) -> None:
+        """Cluster the stored vectors and rebuild the inverted lists."""
+        with self._lock:
+            count = len(self)
+            vectors = self._vectors[:count]
+            nlist = min(self.nlist or max(1, int(4 * np.sqrt(count))), count)
+
+            rng = np.random.default_rng(0)
+            centroids = vectors[rng.choice(count, size=nlist, replace=False)].copy()
+            for _ in range(self.train_iterations):
+                assignments = np.argmax(vectors @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignments, vectors)
+                sizes = np.bincount(assignments, minlength=nlist)
+                empty = sizes == 0
+                # Empty clusters restart from random vectors
+                sums[empty] = vectors[rng.choice(count, size=int(empty.sum()))]
+                centroids = normalize_rows(sums)
+
+            self._centroids = centroids
+            self._assignments = np.zeros(self._vectors.shape[0], dtype=np.int32)
+            self._assignments[:count] = self._assign(vectors)
+            self._lists = [set() for _ in range(nlist)]
+            for row, cluster in enumerate(self._assignments[:count]):
+                self._lists[cluster].add(row)
+            self._trained_size = count
+
+    def _on_update(self, vector_id: str, row: int) -> None:
+        if self._centroids is None:
+            return
+        if self._assignments.shape[0] < self._vectors.shape[0]:
+            grown = np.zeros(self._vectors.shape[0], dtype=np.int32)
+            grown[:self._assignments.shape[0]] = self._assignments
+            self._assignments = grown
+        elif row in self._lists[self._assignments[row]]:
+            self._lists[self._assignments[row]].discard(row)
+
+        cluster = int(self._assign(self._vectors[row:row + 1])[0])
+        self._assignments[row] = cluster
+        self._lists[cluster].add(row)
+
+    def _on_remove(self, row: int) -> None:
+        if self._centroids is not None:
+            self._lists[self._assignments[row]].discard(row)
+
+    def _on_move(self, old_row: int, new_row: int) -> None:
+        if self._centroids is not None:
+            cluster = self._assignments[old_row]
+            self._lists[cluster].discard(old_row)
+            self._lists[cluster].add(new_row)
+            self._assignments[new_row] = cluster
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        if self._centroids is None:
+            return super().search(queries, k)
+
+        queries = normalize_rows(self._check_dims(queries))
+        results = []
+        with self._lock:
+            for query in queries:
+                probes = top_k(self._centroids @ query, self.nprobe)
+                rows = np.fromiter(
+                    (row for cluster in probes for row in self._lists[cluster]), dtype=np.int64
+                )
+                scores = self._vectors[rows] @ query
+                results.append([(self._ids[rows[position]], float(scores[position])) for position in top_k(scores, k)])
+        return results
+
+    def _save(self, path: str) -> dict:
+        metadata = super()._save(path)
+        if self._centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self._centroids)
+            np.save(os.path.join(path, "assignments.npy"), self._assignments[:len(self)])
+        return {
+            **metadata,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "min_train_size": self.min_train_size,
+            "trained_size": self._trained_size
+        }
+
+    @classmethod
+    def _load(cls, path: str, metadata: dict) -> "IVFIndex":
+        exact = ExactIndex._load(path, metadata)
+        index = cls(metadata["dims"], nlist=metadata.get("nlist"), nprobe=metadata.get("nprobe", 8),
+                    min_train_size=metadata.get("min_train_size", 1024))
+        index._vectors, index._ids, index._rows = exact._vectors, exact._ids, exact._rows
+
+        centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index._centroids = np.load(centroids_path)
+            index._assignments = np.load(os.path.join(path, "assignments.npy")).astype(np.int32)
+            index._lists = [set() for _ in range(index._centroids.shape[0])]
+            for row, cluster in enumerate(index._assignments):
+                index._lists[cluster].add(row)
+            index._trained_size = metadata.get("trained_size", len(index))
+        return index
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import List, Optional
+
+from ag_ui.core import (
+    RunStartedEvent,
+    RunFinishedEvent,
+    RunErrorEvent,
+    CustomEvent,
+    EventType
+)
+
+from app.workflow.concurrency import BATCH_MAX_CONCURRENCY
+from app.workflow.langgraph_workflow import hr_screening_workflow
+
+async def batch_screening_workflow(pdf_paths: List[str], max_concurrency: Optional[int] = None):
+    """Screen several CVs concurrently and stream per-candidate progress.
+
+    Each CV runs through hr_screening_workflow. At most max_concurrency screenings run at
+    the same time, while the per-stage limits in app.workflow.concurrency keep Landing AI,
+    Gemini and GitHub calls within quota across all of them.
+
+    Args:
+        pdf_paths (List[str]): Paths of the uploaded CVs.
+        max_concurrency (Optional[int]): Maximum number of screenings running at once.
+
+    Yields:
+        BaseEvent: Batch start, per-candidate progress, per-candidate result and final summary events.
+    """
+    batch_id = str(uuid.uuid4())
+    semaphore = asyncio.Semaphore(max_concurrency or BATCH_MAX_CONCURRENCY)
+    queue: asyncio.Queue = asyncio.Queue()
+    batch_start = time.perf_counter()
+
+    yield RunStartedEvent(type=EventType.RUN_STARTED, thread_id=batch_id, run_id="batch_screening")
+
+    async def screen_candidate(index: int, pdf_path: str) -> dict:
+        file_name = os.path.basename(pdf_path)
+        result = {"index": index, "file_name": file_name, "status": "completed", "recommendation": None, "error": None}
+
+        try:
+            async with semaphore:
+                candidate_start = time.perf_counter()
+                await queue.put(CustomEvent(type=EventType.CUSTOM, name="batch_candidate_started", value={"index": index, "file_name": file_name}))
+
+                async for event in hr_screening_workflow(pdf_path):
+                    if isinstance(event, RunErrorEvent):
+                        result["status"] = "failed"
+                        result["error"] = event.message
+                    elif isinstance(event, RunFinishedEvent) and event.run_id == "candidate_assessment":
+                        result["recommendation"] = event.result
+                    elif isinstance(event, CustomEvent) and event.name == "usage_summary":
+                        result["usage"] = event.value["totals"]
+
+                    # Only forward node level progress, token and step events stay per-candidate
+                    if isinstance(event, (RunStartedEvent, RunFinishedEvent, RunErrorEvent)):
+                        await queue.put(CustomEvent(type=EventType.CUSTOM, name="batch_candidate_progress", value={
+                            "index": index,
+                            "file_name": file_name,
+                            "node": getattr(event, "run_id", None),
+                            "status": event.type.value,
+                            "message": getattr(event, "message", None)
+                        }))
+
+                result["duration_seconds"] = round(time.perf_counter() - candidate_start, 2)
+
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+
+        finally:
+            await queue.put(CustomEvent(type=EventType.CUSTOM, name="batch_candidate_finished", value=result))
+            # Sentinel telling the consumer this candidate is done
+            await queue.put(None)
+
+        return result
+
+    tasks = [asyncio.create_task(screen_candidate(index, pdf_path)) for index, pdf_path in enumerate(pdf_paths)]
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event is None:
+                remaining -= 1
+                continue
+            yield event
+
+        results = [task.result() for task in tasks]
+        elapsed = time.perf_counter() - batch_start
+        completed = [result for result in results if result["status"] == "completed"]
+
+        summary = {
+            "batch_id": batch_id,
+            "total": len(results),
+            "completed": len(completed),
+            "failed": len(results) - len(completed),
+            "proceed_to_interview": sum(
+                1 for result in completed
+                if isinstance(result["recommendation"], dict) and result["recommendation"].get("proceed_to_interview") == "Yes"
+            ),
+            "elapsed_seconds": round(elapsed, 2),
+            "candidates_per_minute": round(len(results) / elapsed * 60, 2) if elapsed else None,
+            "total_tokens": sum(result.get("usage", {}).get("total_tokens", 0) for result in results),
+            "cost_usd": round(sum(result.get("usage", {}).get("cost_usd", 0.0) for result in results), 6),
+            "candidates": results
+        }
+
+        yield CustomEvent(type=EventType.CUSTOM, name="batch_summary", value=summary)
+        yield RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id=batch_id, run_id="batch_screening", result=summary)
+
+    finally:
+        # Client went away or the batch failed: stop screenings still in progress
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,55 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+load_dotenv(override=True)
+
+# Screenings whose last checkpoint is older than this are deleted, 0 keeps every checkpoint
+CHECKPOINT_RETENTION_DAYS = float(os.getenv("CHECKPOINT_RETENTION_DAYS", "30"))
+# Hours between two prunings of the checkpoint database while the API runs
+CHECKPOINT_PRUNE_INTERVAL_HOURS = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_HOURS", "24"))
+
+async def prune_checkpoints(checkpointer: AsyncSqliteSaver, retention_days: float = CHECKPOINT_RETENTION_DAYS) -> int:
+    """Delete the checkpoints and pending writes of the screenings not updated within the retention period.
+
+    Completed screenings and failed ones nobody resumed are dropped alike once their last
+    checkpoint is older than retention_days. Only the public saver API is used, every
+    checkpoint is listed once to find the last update of each thread.
+
+    Args:
+        checkpointer (AsyncSqliteSaver): Saver of the screening graph.
+        retention_days (float): Age of the last checkpoint after which a screening is deleted.
+
+    Returns:
+        int: Number of deleted screenings.
+    """
+    if retention_days <= 0:
+        return 0
+
+    last_updates: dict[str, datetime] = {}
+    async for checkpoint in checkpointer.alist(None):
+        thread_id = checkpoint.config["configurable"]["thread_id"]
+        updated_at = datetime.fromisoformat(checkpoint.checkpoint["ts"])
+        if thread_id not in last_updates or updated_at > last_updates[thread_id]:
+            last_updates[thread_id] = updated_at
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    expired = [thread_id for thread_id, updated_at in last_updates.items() if updated_at < cutoff]
+    for thread_id in expired:
+        await checkpointer.adelete_thread(thread_id)
+
+    return len(expired)
+
+async def run_checkpoint_retention(checkpointer: AsyncSqliteSaver, interval_hours: float = CHECKPOINT_PRUNE_INTERVAL_HOURS) -> None:
+    """Prune the checkpoint database now and then every interval_hours, until cancelled."""
+    while True:
+        try:
+            pruned = await prune_checkpoints(checkpointer)
+            if pruned:
+                print(f"Deleted the checkpoints of {pruned} screenings older than {CHECKPOINT_RETENTION_DAYS:g} days")
+        except Exception as e:
+            print(f"Checkpoint pruning failed: {e}")
+        await asyncio.sleep(interval_hours * 3600)
@@ -0,0 +1,32 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Maximum number of concurrent calls per external service, shared by every screening
+# running in this process so batch runs stay within the providers' quotas
+STAGE_LIMITS = {
+    "landing_ai": int(os.getenv("LANDING_AI_MAX_CONCURRENCY", "4")),
+    "gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+    "github": int(os.getenv("GITHUB_MAX_CONCURRENCY", "4")),
+}
+
+# Maximum number of candidates screened at the same time by a batch run
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "10"))
+
+_stage_semaphores: dict[str, asyncio.Semaphore] = {}
+
+def stage_limit(stage: str) -> asyncio.Semaphore:
+    """Return the process-wide semaphore guarding calls to an external service.
+
+    Args:
+        stage (str): Name of the service, one of STAGE_LIMITS.
+
+    Returns:
+        asyncio.Semaphore: Semaphore to hold for the duration of the call.
+    """
+    semaphore = _stage_semaphores.get(stage)
+    if semaphore is None:
+        semaphore = _stage_semaphores.setdefault(stage, asyncio.Semaphore(STAGE_LIMITS[stage]))
+    return semaphore
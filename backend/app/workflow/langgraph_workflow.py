@@ -1,5 +1,4 @@
 from app.models.graph_state import CVProcessingState
-from app.models.graph_state import CVProcessingState
 from app.models.candidate_info import Candidate
 from app.models.interview_questions import InterviewQAs
 from app.models.score_result import CVScore, ScoreDetail
@@ -16,11 +15,18 @@ from app.nodes.candidate_report_node import send_report_node as candidate_report
 from app.nodes.project_contribution_node import project_contribution_node
 from app.nodes.job_posting_determination_node import job_posting_determination_node
 from app.nodes.candidate_world_check_node import world_check_node
+from app.nodes.persist_candidate_node import persist_candidate_node
+from app.llm_handler.usage_tracker import start_run_usage
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import InMemorySaver
-from ag_ui.core import (RunErrorEvent,EventType)
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from ag_ui.core import (RunErrorEvent, CustomEvent, EventType)
 from ag_ui.core.events import BaseEvent
+import os
 import uuid
+import threading
+import time
+from typing import Callable, Optional
 from langchain_core.runnables import RunnableConfig
 from datetime import datetime
 from pydantic import BaseModel
@@ -30,9 +36,18 @@ class DictEvent(BaseEvent, BaseModel):
     data: dict
 
 
-def create_cv_scoring_workflow():
+# SQLite database holding the checkpoints of every screening, used to resume failed runs
+CHECKPOINT_DB_PATH = os.getenv(
+    "CHECKPOINT_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "checkpoints", "screenings.sqlite")
+)
+
+def create_cv_scoring_workflow(checkpointer: Optional[BaseCheckpointSaver] = None):
     """Create the CV scoring workflow graph.
 
+    Args:
+        checkpointer (Optional[BaseCheckpointSaver]): Saver persisting the state after every step.
+
     Returns:
         StateGraph: The compiled workflow graph for CV processing.
     """
@@ -68,6 +83,7 @@ def create_cv_scoring_workflow():
     workflow.add_node("candidate_assessment_score", candidate_assessment_score_node)
     workflow.add_node("interview_questions", interview_questions_node)
     workflow.add_node("send_candidate_report", candidate_report_node)
+    workflow.add_node("persist_candidate", persist_candidate_node)
     workflow.add_node("error_handler", error_handler_node)
     
     # Define the flow
@@ -83,19 +99,12 @@ def create_cv_scoring_workflow():
         route_after_extraction
     )
 
-    workflow.add_conditional_edges(
-        "cv_scoring",
-        lambda state: "error_handler" if state.get("error") else "candidate_assessment_score"
-    )
-
-    workflow.add_conditional_edges(
-        "social_media_screening",
-        lambda state: "error_handler" if state.get("error") else "candidate_assessment_score"
-    )
-
-    workflow.add_conditional_edges(
-        "project_contribution",
-        lambda state: "error_handler" if state.get("error") else "candidate_assessment_score"
+    # Join the four enrichment branches: assessment runs once, after all of them finished.
+    # A failing branch leaves its message in the error channel, which the assessment node
+    # checks before routing to the error handler.
+    workflow.add_edge(
+        ["cv_scoring", "social_media_screening", "project_contribution", "world_check"],
+        "candidate_assessment_score"
     )
 
     workflow.add_conditional_edges(
@@ -103,8 +112,11 @@ def create_cv_scoring_workflow():
         lambda state: "error_handler" if state.get("error") else "send_candidate_report"
     )
         
+    # Every assessed candidate is stored for reverse search before the interview questions
+    workflow.add_edge("send_candidate_report", "persist_candidate")
+
     workflow.add_conditional_edges(
-        "send_candidate_report",
+        "persist_candidate",
         route_after_scoring
     )
 
@@ -120,19 +132,204 @@ def create_cv_scoring_workflow():
 
     workflow.add_edge("error_handler", END)
 
-    checkpointer = InMemorySaver()
+    return workflow.compile(checkpointer=checkpointer)
+
+# Process-wide registry of compiled workflow graphs.
+# A compiled graph holds no per-run state, so a single instance is shared by every
+# concurrent screening. Runs take a reference to the active graph when they start,
+# so swapping the active version never affects screenings that are already in flight.
+DEFAULT_GRAPH_VERSION = "v1"
+
+_graph_registry: dict[str, CompiledStateGraph] = {}
+_graph_compile_events: dict[str, CustomEvent] = {}
+_active_graph_version: Optional[str] = None
+_graph_checkpointer: Optional[BaseCheckpointSaver] = None
+_graph_registry_lock = threading.RLock()
+
+def compile_workflow_graph(version: str = DEFAULT_GRAPH_VERSION,
+                           factory: Callable[..., CompiledStateGraph] = create_cv_scoring_workflow,
+                           activate: bool = True,
+                           checkpointer: Optional[BaseCheckpointSaver] = None) -> CustomEvent:
+    """Compile a workflow graph, store it in the registry and optionally make it active.
+
+    Args:
+        version (str): Label under which the compiled graph is registered.
+        factory (Callable): Function building and compiling the graph from a checkpointer.
+        activate (bool): Whether new runs should use this graph immediately.
+        checkpointer (Optional[BaseCheckpointSaver]): Saver to compile with, remembered for later versions.
+
+    Returns:
+        CustomEvent: Timing event reporting how long the compilation took.
+    """
+    global _active_graph_version, _graph_checkpointer
+
+    with _graph_registry_lock:
+        if checkpointer is not None:
+            _graph_checkpointer = checkpointer
+        checkpointer = _graph_checkpointer
+
+    start = time.perf_counter()
+    compiled_graph = factory(checkpointer=checkpointer)
+    compile_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    compile_event = CustomEvent(
+        type=EventType.CUSTOM,
+        name="workflow_graph_compiled",
+        value={"version": version, "compile_ms": compile_ms, "active": activate}
+    )
+
+    with _graph_registry_lock:
+        _graph_registry[version] = compiled_graph
+        _graph_compile_events[version] = compile_event
+        if activate:
+            _active_graph_version = version
+
+    print(f"Workflow graph '{version}' compiled in {compile_ms} ms")
+    return compile_event
+
+def activate_workflow_graph(version: str) -> None:
+    """Switch the graph used by new runs to an already compiled version.
+
+    Args:
+        version (str): Label of a previously compiled graph.
+    """
+    global _active_graph_version
+
+    with _graph_registry_lock:
+        if version not in _graph_registry:
+            raise KeyError(f"Workflow graph version '{version}' has not been compiled")
+        _active_graph_version = version
+
+def get_workflow_graph_with_event(version: Optional[str] = None) -> tuple[CompiledStateGraph, CustomEvent]:
+    """Return a compiled workflow graph with its compile timing event, compiling the default one on first use.
+
+    Args:
+        version (Optional[str]): Registered version to fetch. Defaults to the active version.
+
+    Returns:
+        tuple[CompiledStateGraph, CustomEvent]: The compiled graph, safe to share across concurrent
+        runs, and the workflow_graph_compiled event of its version.
+    """
+    with _graph_registry_lock:
+        if _active_graph_version is None:
+            compile_workflow_graph()
+
+        version = version or _active_graph_version
+        return _graph_registry[version], _graph_compile_events[version]
+
+def get_workflow_graph(version: Optional[str] = None) -> CompiledStateGraph:
+    """Return a compiled workflow graph, compiling the default one on first use."""
+    return get_workflow_graph_with_event(version)[0]
+
+def get_workflow_graph_info() -> dict:
+    """Describe the compiled graphs currently held in the registry."""
+    with _graph_registry_lock:
+        return {
+            "active_version": _active_graph_version,
+            "versions": {version: event.value for version, event in _graph_compile_events.items()}
+        }
+
+async def stream_workflow_graph(workflow_graph: CompiledStateGraph, graph_input: Optional[dict], config: RunnableConfig):
+    """Stream the custom events of a graph run as AG-UI events.
+
+    Args:
+        workflow_graph (CompiledStateGraph): Compiled graph to execute.
+        graph_input (Optional[dict]): Initial state, or None to continue from the checkpoint in config.
+        config (RunnableConfig): Run configuration holding the thread id.
+
+    Yields:
+        BaseEvent: Events written by the workflow nodes, followed by the run's usage summary.
+    """
+    # Node tasks inherit this tracker, so every LLM and embedding call of the run lands in it
+    run_usage = start_run_usage()
+
+    try:
+
+        # Stream workflow node updates
+        async for chunk in workflow_graph.astream(
+            graph_input,
+            config = config,
+            stream_mode= "custom"
+            
+        ):
+
+            if isinstance(chunk, dict):
+                event_to_send = DictEvent(type=EventType.TEXT_MESSAGE_CONTENT,data=chunk)
+            elif isinstance(chunk, str):
+                event_to_send = DictEvent(type=EventType.TEXT_MESSAGE_CONTENT,data={"message": chunk})
+            else:
+                event_to_send = chunk
 
+            yield event_to_send
 
+    except Exception as e:
+        yield RunErrorEvent(type=EventType.RUN_ERROR, message=str(e))
+        print(f"❌ Workflow execution failed: {str(e)}")
 
-    return workflow.compile()
+    yield CustomEvent(type=EventType.CUSTOM, name="usage_summary", value=run_usage.summary())
 
-async def hr_screening_workflow(pdf_path: str):
+async def find_resume_checkpoint(workflow_graph: CompiledStateGraph, thread_id: str) -> Optional[RunnableConfig]:
+    """Find the checkpoint a screening should resume from.
+
+    Nodes report failures through the error channel instead of raising, so a failed run
+    ends normally with an error in its state. The resume point is therefore the most
+    recent checkpoint that still has nodes to run and no error recorded.
+
+    Args:
+        workflow_graph (CompiledStateGraph): Graph compiled with a checkpointer.
+        thread_id (str): Thread id of the screening to resume.
+
+    Returns:
+        Optional[RunnableConfig]: Config pointing at the checkpoint, or None if there is nothing to resume.
+    """
+    config = RunnableConfig(configurable={"thread_id": thread_id})
+
+    async for snapshot in workflow_graph.aget_state_history(config):
+        if snapshot.values.get("error"):
+            continue
+        if snapshot.next:
+            return snapshot.config
+        # Latest error-free checkpoint has nothing left to run: the screening completed
+        return None
+
+    return None
+
+async def resume_screening_workflow(thread_id: str):
+    """Resume a failed or interrupted screening from its last completed step.
+
+    Args:
+        thread_id (str): Thread id reported by hr_screening_workflow when the screening started.
+
+    Yields:
+        BaseEvent: Events written by the nodes that still had to run.
+    """
+    workflow_graph, compile_event = get_workflow_graph_with_event()
+
+    if workflow_graph.checkpointer is None:
+        yield RunErrorEvent(type=EventType.RUN_ERROR, message="Workflow graph was compiled without a checkpointer")
+        return
+
+    resume_config = await find_resume_checkpoint(workflow_graph, thread_id)
+
+    if resume_config is None:
+        yield RunErrorEvent(type=EventType.RUN_ERROR, message=f"No resumable checkpoint found for thread {thread_id}")
+        return
+
+    print(f"Resuming HR screening workflow {thread_id}...")
+    yield CustomEvent(type=EventType.CUSTOM, name="screening_thread", value={"thread_id": thread_id, "resumed": True})
+    # Version and compile time of the graph running the screening
+    yield compile_event
+
+    async for event in stream_workflow_graph(workflow_graph, None, resume_config):
+        yield event
+
+async def hr_screening_workflow(pdf_path: str, thread_id: Optional[str] = None):
 
     print("Starting HR screening workflow...")
     # pdf_path = "app/knowledge_base/pdf_templates/ABDUL Muhammad Muazzam_Ul_Hussein CV.pdf"
     # job_description = open("app/knowledge_base/scoring_process/job_description.txt").read()
 
-    workflow_graph = create_cv_scoring_workflow()
+    workflow_graph, compile_event = get_workflow_graph_with_event()
 
     initial_state = CVProcessingState(
         pdf_path=pdf_path,
@@ -205,26 +402,13 @@ async def hr_screening_workflow(pdf_path: str):
         error=""
     )
 
-    try:
-
-        config = RunnableConfig(configurable={"thread_id": uuid.uuid4()})
-        # Stream workflow node updates
-        for chunk in workflow_graph.stream(
-            initial_state,
-            # config = config,
-            stream_mode= "custom"
-            
-        ):
-
-            if isinstance(chunk, dict):
-                event_to_send = DictEvent(type=EventType.TEXT_MESSAGE_CONTENT,data=chunk)
-            elif isinstance(chunk, str):
-                event_to_send = DictEvent(type=EventType.TEXT_MESSAGE_CONTENT,data={"message": chunk})
-            else:
-                event_to_send = chunk
+    # Each screening checkpoints under its own thread so it can be resumed after a failure
+    thread_id = thread_id or str(uuid.uuid4())
+    config = RunnableConfig(configurable={"thread_id": thread_id})
 
-            yield event_to_send
+    yield CustomEvent(type=EventType.CUSTOM, name="screening_thread", value={"thread_id": thread_id, "resumed": False})
+    # Version and compile time of the graph running the screening
+    yield compile_event
 
-    except Exception as e:
-        yield RunErrorEvent(type=EventType.RUN_ERROR, message=str(e))
-        print(f"❌ Workflow execution failed: {str(e)}")
\ No newline at end of file
+    async for event in stream_workflow_graph(workflow_graph, initial_state, config):
+        yield event
@@ -0,0 +1,31 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from app.workflow.checkpoint_retention import prune_checkpoints
+
+async def save_checkpoint(checkpointer, thread_id, age_days):
+    checkpoint = empty_checkpoint()
+    checkpoint["ts"] = (datetime.now(timezone.utc) - timedelta(days=age_days)).isoformat()
+    await checkpointer.aput({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, checkpoint, {}, {})
+
+async def prune(path, retention_days):
+    async with AsyncSqliteSaver.from_conn_string(path) as checkpointer:
+        await save_checkpoint(checkpointer, "old", 40)
+        await save_checkpoint(checkpointer, "recent", 40)
+        await save_checkpoint(checkpointer, "recent", 1)
+        pruned = await prune_checkpoints(checkpointer, retention_days=retention_days)
+        remaining = [
+            thread_id for thread_id in ("old", "recent")
+            if await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}}) is not None
+        ]
+    return pruned, remaining
+
+def test_prune_deletes_screenings_whose_last_checkpoint_is_older_than_the_retention(tmp_path):
+    # The recent thread also holds an old checkpoint, only the age of its last one counts
+    assert asyncio.run(prune(str(tmp_path / "checkpoints.sqlite"), 30)) == (1, ["recent"])
+
+def test_prune_keeps_everything_when_retention_is_disabled(tmp_path):
+    assert asyncio.run(prune(str(tmp_path / "checkpoints.sqlite"), 0)) == (0, ["old", "recent"])
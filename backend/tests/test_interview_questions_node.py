@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+from langgraph.graph import StateGraph, START, END
+
+import app.agent_tools.validate_questions_tool as validate_questions_tool
+import app.nodes.interview_questions_node as interview_questions_node
+from app.models.graph_state import CVProcessingState
+from app.models.interview_questions import InterviewQAs, QuestionReplacement, QuestionReplacements
+
+# Posting row as stored in the state by the job posting determination node
+JOB_DESCRIPTION = {
+    "id": "posting-1",
+    "title": "Backend Engineer",
+    "department": "Engineering",
+    "description": "Build Python services",
+    "experience": "3 years",
+    "skills": ["Python"],
+    "requirements": ["APIs"],
+    "createdAt": "2025-01-01T00:00:00",
+    "updatedAt": None
+}
+
+class FakeEmbedder:
+    """Questions mentioning Python are close to the CV and the posting, the others are not."""
+
+    def chunk_document(self, text):
+        return [text]
+
+    def embed_text(self, texts, node_id=None):
+        return np.asarray([[1.0, 0.0] if "Python" in text else [0.0, 1.0] for text in texts], dtype=np.float32)
+
+class FakeJobPostingIndex:
+    def __init__(self):
+        self.requested_ids = []
+
+    def get_vector(self, job_posting_id):
+        self.requested_ids.append(job_posting_id)
+        return np.asarray([[1.0, 0.0]], dtype=np.float32)
+
+class FakeTool:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def ainvoke(self, arguments):
+        self.calls.append(arguments)
+        return self.result
+
+def run_node(state):
+    graph = StateGraph(CVProcessingState)
+    graph.add_node("interview_questions", interview_questions_node.interview_questions_node)
+    graph.add_edge(START, "interview_questions")
+    graph.add_edge("interview_questions", END)
+    return asyncio.run(graph.compile().ainvoke(state))
+
+def test_node_validates_with_dict_job_description_and_replaces_flagged_questions(monkeypatch):
+    questions = InterviewQAs(
+        technical_questions=["How do you profile Python services?", "Describe your basket weaving technique."],
+        behavioral_questions=["Tell me about a Python code review you led."],
+        experience_questions=[],
+        situational_questions=[],
+        cultural_fit_questions=[],
+        areas_to_probe=[],
+        red_flag_questions=[],
+        interview_duration="45 minutes"
+    )
+    regenerate = FakeTool(QuestionReplacements(replacements=[
+        QuestionReplacement(category="technical_questions", index=1, question="How do you test async Python code?")
+    ]))
+    job_posting_index = FakeJobPostingIndex()
+
+    monkeypatch.setattr(validate_questions_tool, "get_embedder", lambda: FakeEmbedder())
+    monkeypatch.setattr(validate_questions_tool, "job_posting_index", job_posting_index)
+    monkeypatch.setattr(interview_questions_node, "generate_interview_questions", FakeTool(questions))
+    monkeypatch.setattr(interview_questions_node, "regenerate_flagged_questions", regenerate)
+
+    result = run_node({
+        "cv_data": SimpleNamespace(markdown="Python developer"),
+        "job_description": JOB_DESCRIPTION,
+        "messages": []
+    })
+
+    assert not result.get("error")
+    assert result["interview_questions"].technical_questions == [
+        "How do you profile Python services?",
+        "How do you test async Python code?"
+    ]
+    assert result["interview_questions"].behavioral_questions == questions.behavioral_questions
+    assert job_posting_index.requested_ids == ["posting-1", "posting-1"]
+
+    # Only the flagged question is sent for regeneration
+    assert len(regenerate.calls) == 1
+    assert [(flagged["category"], flagged["index"]) for flagged in regenerate.calls[0]["flagged_questions"]] == [("technical_questions", 1)]
@@ -0,0 +1,38 @@
+import json
+
+import numpy as np
+import pytest
+
+import app.database.job_posting_index as job_posting_index_module
+from app.database.job_posting_index import JobPostingIndex
+from app.database.vector_codec import encode_vector, to_bytea
+
+class FakeEmbedder:
+    def __init__(self, dimensions):
+        self.model_name = "current-model"
+        self.dimensions = dimensions
+
+def binary_posting(posting_id, vector, model_name="current-model"):
+    return {"id": posting_id, "job_postings_embedding": to_bytea(encode_vector(np.asarray(vector, dtype=np.float32), model_name))}
+
+def legacy_posting(posting_id, vector):
+    return {"id": posting_id, "job_postings_embedding": None, "job_postings_vector": json.dumps(vector)}
+
+# Legacy rows first, so the width can't come from the order the database returns them in
+MIXED_POSTINGS = [
+    legacy_posting("legacy-previous-model", [1.0, 0.0]),
+    legacy_posting("legacy-current-model", [0.0, 1.0, 0.0]),
+    binary_posting("binary-current-model", [1.0, 0.0, 0.0]),
+    binary_posting("binary-previous-model", [0.0, 1.0], model_name="previous-model"),
+]
+
+@pytest.mark.parametrize("dimensions", [3, None])
+def test_build_skips_vectors_of_another_model_or_width(monkeypatch, tmp_path, dimensions):
+    monkeypatch.setattr(job_posting_index_module, "get_embedder", lambda: FakeEmbedder(dimensions))
+    index = JobPostingIndex(path=str(tmp_path / "job_posting_index"), backend="exact")
+
+    index.build(MIXED_POSTINGS)
+
+    assert len(index) == 2
+    matches = index.search(np.asarray([[1.0, 0.1, 0.0]], dtype=np.float32), k=2)
+    assert [posting["id"] for posting, _ in matches] == ["binary-current-model", "legacy-current-model"]